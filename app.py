@@ -3,38 +3,101 @@ Final Flask Text-to-SQL Application with PCI/MNPI Compliance
 Complete secure implementation with OpenAI integration
 """
 
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, request, jsonify, render_template, send_from_directory, stream_with_context
+from flask.json.provider import JSONProvider
 from config import Config
 from models.database import DatabaseManager
 from services.secure_text_to_sql_service import SecureTextToSQLService
+from services.query_batcher import BatchingTextToSQLExecutor
+from jinja2 import Environment
 import os
+import atexit
+import concurrent.futures
+import itertools
+import queue
+import sqlite3
+import time
+from functools import lru_cache
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 import traceback
+import orjson
 
 # Configure comprehensive logging
+# Request threads only enqueue records; a background listener formats them
+# and does the file/console writes
+
+class DeferredFormatQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues records unformatted.
+    
+    The stock prepare() formats the message on the logging thread. The
+    queue here is in-process, so nothing is pickled and the record's args
+    and exc_info can be handed to the listener as they are.
+    """
+    
+    def prepare(self, record):
+        return record
+
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [
+    logging.FileHandler('app.log'),
+    logging.StreamHandler()
+]
+for handler in log_handlers:
+    handler.setFormatter(log_formatter)
+
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+queue_handler = DeferredFormatQueueHandler(log_queue)
+
 logging.basicConfig(
     level=getattr(logging, Config.LOG_LEVEL.upper() if hasattr(Config, 'LOG_LEVEL') else 'INFO'),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[queue_handler]
 )
 logger = logging.getLogger(__name__)
 
+# ============================================================================
+# JSON SERIALIZATION
+# ============================================================================
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson, which is much faster on large result sets"""
+    
+    OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=str, option=self.OPTIONS).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Skip the bytes -> str -> bytes round trip of the base implementation
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=str, option=self.OPTIONS),
+            mimetype='application/json'
+        )
+
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = ORJSONProvider(app)
 
 # Global variables for services
 db_manager = None
 text_to_sql_service = None
+query_executor = None
 app_start_time = datetime.now()
 
 def initialize_services():
     """Initialize database manager and secure text-to-SQL service"""
-    global db_manager, text_to_sql_service
+    global db_manager, text_to_sql_service, query_executor
     
     try:
         logger.info("Initializing application services...")
@@ -47,18 +110,22 @@ def initialize_services():
         
         # Initialize database manager
         db_manager = DatabaseManager(app.config['DATABASE_PATH'])
+        atexit.register(db_manager.close)
         logger.info(f"Database manager initialized: {app.config['DATABASE_PATH']}")
         
         # Initialize secure text-to-SQL service
         text_to_sql_service = SecureTextToSQLService(db_manager)
-        logger.info("Secure text-to-SQL service initialized")
-        
-        # Log security status
-        compliance = text_to_sql_service.validate_security_compliance()
-        logger.info(f"Security compliance: {compliance['compliance_percentage']:.1f}% ({compliance['security_level']})")
-        
-        if not compliance['is_fully_compliant']:
-            logger.warning(f"Missing mock tables for: {compliance['missing_mock_tables']}")
+        logger.info("Secure text-to-SQL service initialized (schema context loads on first use)")
+        
+        # Coalesce concurrent questions into shared OpenAI calls
+        query_executor = BatchingTextToSQLExecutor(
+            text_to_sql_service,
+            max_batch_size=Config.QUERY_BATCH_MAX_SIZE,
+            max_wait_ms=Config.QUERY_BATCH_WINDOW_MS,
+            max_concurrent_batches=Config.QUERY_BATCH_MAX_CONCURRENCY,
+            # Rows are executed and streamed by the request thread
+            execute_queries=False
+        )
         
         return True
         
@@ -69,24 +136,42 @@ def initialize_services():
 
 # Initialize services on startup
 services_initialized = initialize_services()
+app.extensions['services_ready'] = services_initialized
+
+# Fallback page compiled once at import time
+_NOT_READY_TEMPLATE = Environment(autoescape=True).from_string("""
+            <html><body>
+                <h1>⚠️ Application Not Ready</h1>
+                <p>The application could not initialize properly.</p>
+                <p>Please check the logs and ensure the database is set up correctly.</p>
+                <p>Run: <code>python setup_database.py</code></p>
+            </body></html>
+            """)
 
 # ============================================================================
 # ROUTE HANDLERS
 # ============================================================================
 
+# Endpoints that report on initialization themselves
+SERVICE_GUARD_EXEMPT = frozenset(('/api/health', '/api/config'))
+
+@app.before_request
+def require_services():
+    """Short-circuit API requests while services are not initialized"""
+    if (not app.extensions['services_ready'] and request.path.startswith('/api/')
+            and request.path not in SERVICE_GUARD_EXEMPT):
+        return jsonify({
+            'success': False,
+            'error': 'Application services not properly initialized',
+            'suggestion': 'Please restart the application or check the logs'
+        }), 503
+
 @app.route('/')
 def index():
     """Render the main page"""
     try:
-        if not services_initialized:
-            return render_template_string("""
-            <html><body>
-                <h1>⚠️ Application Not Ready</h1>
-                <p>The application could not initialize properly.</p>
-                <p>Please check the logs and ensure the database is set up correctly.</p>
-                <p>Run: <code>python setup_database.py</code></p>
-            </body></html>
-            """), 500
+        if not app.extensions['services_ready']:
+            return _NOT_READY_TEMPLATE.render(), 500
         
         return render_template('index.html')
         
@@ -97,18 +182,24 @@ def index():
 @app.route('/api/query', methods=['POST'])
 def process_query():
     """Process natural language query and return SQL results"""
-    if not services_initialized or not text_to_sql_service:
-        return jsonify({
-            'success': False,
-            'error': 'Application services not properly initialized',
-            'suggestion': 'Please restart the application or check the logs'
-        }), 500
-    
     try:
-        # Get request data
-        data = request.get_json()
+        # Parse the body directly; skips get_json()'s caching and negotiation
+        if not request.is_json:
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be JSON',
+                'suggestion': 'Send the question with Content-Type: application/json'
+            }), 415
+        try:
+            data = orjson.loads(request.get_data(cache=False))
+        except orjson.JSONDecodeError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid JSON in request body',
+                'suggestion': 'Please provide a question in the request body'
+            }), 400
         
-        if not data or 'question' not in data:
+        if not isinstance(data, dict) or 'question' not in data:
             return jsonify({
                 'success': False,
                 'error': 'No question provided',
@@ -125,16 +216,19 @@ def process_query():
         
         # Log the request
         client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
-        logger.info(f"Processing query from {client_ip}: {question[:100]}...")
-        
-        # Process the question securely
-        result = text_to_sql_service.process_question(question)
+        logger.info("Processing query from %s: %.100s...", client_ip, question)
         
-        # Log the result
-        if result['success']:
-            logger.info(f"Query successful: {result['query'][:100]}..., returned {result['result']['row_count']} rows")
-        else:
-            logger.warning(f"Query failed: {result['error']}")
+        # Generate and validate SQL securely, batched with any concurrent questions
+        try:
+            result = query_executor.submit(question).result(timeout=Config.QUERY_TIMEOUT_SECONDS)
+        except concurrent.futures.TimeoutError:
+            logger.error("Query timed out after %ss: %.100s...", Config.QUERY_TIMEOUT_SECONDS, question)
+            return jsonify({
+                'success': False,
+                'error': f'Query timed out after {Config.QUERY_TIMEOUT_SECONDS:g} seconds',
+                'question': question,
+                'suggestion': 'Please try again in a moment'
+            }), 504
         
         # Add metadata to response
         result['metadata'] = {
@@ -143,30 +237,164 @@ def process_query():
             'api_version': '1.0.0'
         }
         
-        return jsonify(result)
+        if not result['success']:
+            logger.warning("Query failed: %s", result['error'])
+            return jsonify(result)
+        
+        # Execute on this thread's connection; rows are fetched lazily
+        success, query_result = text_to_sql_service.validator.stream_safe_query(
+            result['query'],
+            limit=app.config['MAX_QUERY_RESULTS']
+        )
+        body = None
+        if success:
+            # Produce the first chunk (document head and first rows) before
+            # committing to a 200, so errors on the first step still get a
+            # proper error response
+            body = stream_query_response(result, query_result)
+            try:
+                first_chunk = next(body)
+            except sqlite3.Error as e:
+                success, query_result = False, f"SQL Error: {str(e)}"
+        if not success:
+            logger.warning("Query failed: %s", query_result)
+            result.update({
+                'success': False,
+                'error': query_result,
+                'suggestion': 'The SQL was valid but failed to execute. Check if the referenced tables and columns exist.'
+            })
+            return jsonify(result)
+        
+        # stream_with_context keeps the request (and its DB connection) alive
+        # until the last row has been sent
+        return Response(
+            stream_with_context(itertools.chain((first_chunk,), body)),
+            mimetype='application/json'
+        )
         
     except Exception as e:
-        logger.error(f"Error processing query: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error processing query: %s", e)
         return jsonify({
             'success': False,
             'error': f'Server error: {str(e)}',
             'suggestion': 'Please try again or contact support if the issue persists'
         }), 500
 
-@app.route('/api/database-info')
-def get_database_info():
-    """Get database schema information with security status"""
-    if not services_initialized or not text_to_sql_service:
+@app.route('/api/queries', methods=['POST'])
+def process_queries():
+    """Process several natural language questions in one request"""
+    try:
+        if not request.is_json:
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be JSON',
+                'suggestion': 'Send the questions with Content-Type: application/json'
+            }), 415
+        try:
+            data = orjson.loads(request.get_data(cache=False))
+        except orjson.JSONDecodeError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid JSON in request body',
+                'suggestion': 'Please provide a list of questions in the request body'
+            }), 400
+        
+        questions = data.get('questions') if isinstance(data, dict) else None
+        if not isinstance(questions, list) or not questions:
+            return jsonify({
+                'success': False,
+                'error': 'No questions provided',
+                'suggestion': 'Please provide a non-empty "questions" list in the request body'
+            }), 400
+        
+        # Buffered results can be requested column-oriented, which is smaller
+        # for large result sets; row layout (as /api/query) by default
+        layout = data.get('layout', 'rows')
+        if layout not in ('rows', 'columnar'):
+            return jsonify({
+                'success': False,
+                'error': f'Unknown result layout: {layout}',
+                'suggestion': 'Use "rows" or "columnar" for "layout"'
+            }), 400
+        
+        max_questions = Config.MAX_QUESTIONS_PER_REQUEST
+        if len(questions) > max_questions:
+            return jsonify({
+                'success': False,
+                'error': f'Too many questions: {len(questions)} (maximum {max_questions})',
+                'suggestion': 'Split the questions across several requests'
+            }), 400
+        
+        if not all(isinstance(question, str) and question.strip() for question in questions):
+            return jsonify({
+                'success': False,
+                'error': 'Empty question provided',
+                'suggestion': 'Every entry in "questions" must be a non-empty string'
+            }), 400
+        
+        client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
+        logger.info("Processing %d queries from %s", len(questions), client_ip)
+        
+        # Submit everything before waiting so the questions share batches and
+        # their OpenAI calls run concurrently on the executor's event loop
+        futures = [query_executor.submit(question.strip()) for question in questions]
+        
+        # One deadline for the whole request, so the waits add up to at most the timeout
+        deadline = time.monotonic() + Config.QUERY_TIMEOUT_SECONDS
+        results = []
+        for question, future in zip(questions, futures):
+            try:
+                result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except concurrent.futures.TimeoutError:
+                logger.error("Query timed out after %ss: %.100s...", Config.QUERY_TIMEOUT_SECONDS, question)
+                results.append({
+                    'success': False,
+                    'error': f'Query timed out after {Config.QUERY_TIMEOUT_SECONDS:g} seconds',
+                    'question': question.strip(),
+                    'suggestion': 'Please try again in a moment'
+                })
+                continue
+            if result['success']:
+                success, query_result = text_to_sql_service.validator.execute_safe_query(
+                    result['query'],
+                    limit=app.config['MAX_QUERY_RESULTS'],
+                    columnar=layout == 'columnar'
+                )
+                if success:
+                    result['result'] = query_result
+                else:
+                    result.update({
+                        'success': False,
+                        'error': query_result,
+                        'suggestion': 'The SQL was valid but failed to execute. Check if the referenced tables and columns exist.'
+                    })
+            results.append(result)
+        
+        return jsonify({
+            'success': all(result['success'] for result in results),
+            'results': results,
+            'metadata': {
+                'question_count': len(results),
+                'security_mode': 'PCI/MNPI_compliant',
+                'api_version': '1.0.0'
+            }
+        })
+        
+    except Exception as e:
+        logger.exception("Error processing queries: %s", e)
         return jsonify({
             'success': False,
-            'error': 'Application services not properly initialized'
+            'error': f'Server error: {str(e)}',
+            'suggestion': 'Please try again or contact support if the issue persists'
         }), 500
-    
+
+@app.route('/api/database-info')
+def get_database_info():
+    """Get database schema information with security status"""
     try:
-        info = text_to_sql_service.get_database_info()
+        body = database_info_body(*status_cache_key())
         logger.debug("Database info retrieved successfully")
-        return jsonify(info)
+        return Response(body, 200, content_type='application/json')
         
     except Exception as e:
         logger.error(f"Error getting database info: {e}")
@@ -178,15 +406,11 @@ def get_database_info():
 @app.route('/api/refresh-schema', methods=['POST'])
 def refresh_schema():
     """Refresh database schema cache"""
-    if not services_initialized or not text_to_sql_service:
-        return jsonify({
-            'success': False,
-            'error': 'Application services not properly initialized'
-        }), 500
-    
     try:
         logger.info("Refreshing database schema cache...")
         text_to_sql_service.refresh_context()
+        database_info_body.cache_clear()
+        health_body.cache_clear()
         
         # Get updated info
         info = text_to_sql_service.get_database_info()
@@ -208,12 +432,6 @@ def refresh_schema():
 @app.route('/api/openai-status')
 def check_openai_status():
     """Check OpenAI API status and configuration"""
-    if not services_initialized or not text_to_sql_service:
-        return jsonify({
-            'success': False,
-            'error': 'Application services not properly initialized'
-        }), 500
-    
     try:
         is_connected = text_to_sql_service.test_openai_connection()
         
@@ -237,12 +455,6 @@ def check_openai_status():
 @app.route('/api/security-status')
 def get_security_status():
     """Get detailed security compliance status"""
-    if not services_initialized or not text_to_sql_service:
-        return jsonify({
-            'success': False,
-            'error': 'Application services not properly initialized'
-        }), 500
-    
     try:
         compliance = text_to_sql_service.validate_security_compliance()
         table_status = text_to_sql_service.get_table_sample_status()
@@ -265,24 +477,14 @@ def get_security_status():
 def get_health():
     """Get comprehensive application health status"""
     try:
-        if not services_initialized or not text_to_sql_service:
+        if not app.extensions['services_ready']:
             return jsonify({
                 'status': 'unhealthy',
                 'error': 'Services not initialized',
                 'timestamp': datetime.now().isoformat()
             }), 500
         
-        health = text_to_sql_service.get_service_health()
-        
-        # Add application-level health info
-        health.update({
-            'app_uptime_seconds': (datetime.now() - app_start_time).total_seconds(),
-            'database_path': app.config['DATABASE_PATH'],
-            'debug_mode': app.config['DEBUG'],
-            'flask_env': app.config.get('ENV', 'unknown')
-        })
-        
-        return jsonify(health)
+        return Response(health_body(*status_cache_key()), 200, content_type='application/json')
         
     except Exception as e:
         logger.error(f"Error getting health status: {e}")
@@ -295,12 +497,6 @@ def get_health():
 @app.route('/api/mock-setup-script')
 def get_mock_setup_script():
     """Get SQL script to create missing mock tables"""
-    if not services_initialized or not text_to_sql_service:
-        return jsonify({
-            'success': False,
-            'error': 'Application services not properly initialized'
-        }), 500
-    
     try:
         script = text_to_sql_service.generate_mock_setup_script()
         
@@ -362,12 +558,16 @@ def internal_error(error):
 
 @app.teardown_appcontext
 def close_db(error):
-    """Close database connection on request completion"""
-    if db_manager and hasattr(db_manager, 'close'):
+    """
+    Return this request's database connection to the pool.
+    
+    Connections stay open across requests and are only closed at shutdown.
+    """
+    if db_manager and hasattr(db_manager, 'release'):
         try:
-            db_manager.close()
+            db_manager.release()
         except Exception as e:
-            logger.error(f"Error closing database connection: {e}")
+            logger.error(f"Error releasing database connection: {e}")
 
 @app.teardown_request
 def log_request(error):
@@ -409,11 +609,82 @@ def favicon():
 # UTILITY FUNCTIONS
 # ============================================================================
 
-def render_template_string(template_string, **context):
-    """Simple template string renderer for error pages"""
-    for key, value in context.items():
-        template_string = template_string.replace(f'{{{{{key}}}}}', str(value))
-    return template_string
+# Status payloads are rebuilt at most once per bucket (or schema change)
+STATUS_CACHE_SECONDS = 5
+
+def status_cache_key():
+    """Cache key for status payloads: schema version plus a coarse time bucket"""
+    return (
+        text_to_sql_service.schema_inspector.get_schema_version(),
+        int(time.monotonic() // STATUS_CACHE_SECONDS)
+    )
+
+@lru_cache(maxsize=4)
+def database_info_body(schema_version, time_bucket):
+    """Serialized /api/database-info payload"""
+    info = text_to_sql_service.get_database_info()
+    return orjson.dumps(info, default=str, option=ORJSONProvider.OPTIONS)
+
+@lru_cache(maxsize=4)
+def health_body(schema_version, time_bucket):
+    """Serialized /api/health payload"""
+    health = text_to_sql_service.get_service_health()
+    
+    # Add application-level health info
+    health.update({
+        'app_uptime_seconds': (datetime.now() - app_start_time).total_seconds(),
+        'database_path': app.config['DATABASE_PATH'],
+        'debug_mode': app.config['DEBUG'],
+        'flask_env': app.config.get('ENV', 'unknown')
+    })
+    
+    return orjson.dumps(health, default=str, option=ORJSONProvider.OPTIONS)
+
+def stream_query_response(result, query_result, chunk_size=256):
+    """
+    Yield a query response as JSON chunks while rows are fetched.
+    
+    The document has the same shape as a buffered response; row_count is
+    written after the rows since it is only known once they are exhausted.
+    The first chunk carries the first rows, so an error fetching them is
+    raised from the first next(). A later error closes the document with
+    an "error" member instead of cutting it off.
+    """
+    rows = query_result['rows']
+    
+    def dump_chunk():
+        return [
+            orjson.dumps(row, default=str, option=ORJSONProvider.OPTIONS)
+            for row in itertools.islice(rows, chunk_size)
+        ]
+    
+    chunk = dump_chunk()
+    head = orjson.dumps(result, default=str, option=ORJSONProvider.OPTIONS)
+    yield (
+        head[:-1]
+        + b',"result":{"columns":' + orjson.dumps(query_result['columns'])
+        + b',"query":' + orjson.dumps(query_result['query'])
+        + b',"data":[' + b','.join(chunk)
+    )
+    
+    row_count = len(chunk)
+    error = None
+    try:
+        while len(chunk) == chunk_size:
+            chunk = dump_chunk()
+            if chunk:
+                yield b',' + b','.join(chunk)
+                row_count += len(chunk)
+    except sqlite3.Error as e:
+        logger.error("Query failed after %d rows: %s", row_count, e)
+        error = f"SQL Error: {str(e)}"
+    
+    tail = b'],"row_count":%d}' % row_count
+    if error is not None:
+        tail += b',"error":' + orjson.dumps(error)
+    yield tail + b'}'
+    if error is None and logger.isEnabledFor(logging.INFO):
+        logger.info("Query successful: %.100s..., returned %d rows", query_result['query'], row_count)
 
 def validate_environment():
     """Validate environment configuration"""
@@ -432,6 +703,8 @@ def validate_environment():
 # ============================================================================
 
 if __name__ == '__main__':
+    # Development server only; production runs under gunicorn:
+    #   gunicorn -c gunicorn.conf.py
     # Validate environment before starting
     env_issues = validate_environment()
     if env_issues:
@@ -450,7 +723,7 @@ if __name__ == '__main__':
             logger.error("Run: python setup_database.py")
     
     # Start the application
-    logger.info(f"\n🌐 Starting server on http://localhost:5000")
+    logger.info(f"\n🌐 Starting development server on http://localhost:5000")
     logger.info("📖 API Documentation available at /api/health")
     
     try:
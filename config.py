@@ -19,4 +19,15 @@ class Config:
     OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4.1')  # or 'gpt-3.5-turbo'
     OPENAI_TEMPERATURE = float(os.environ.get('OPENAI_TEMPERATURE', 0.1))
     OPENAI_MAX_TOKENS = int(os.environ.get('OPENAI_MAX_TOKENS', 500))
-
+    
+    # Query batching: concurrent questions arriving within the window share one OpenAI call
+    QUERY_BATCH_MAX_SIZE = int(os.environ.get('QUERY_BATCH_MAX_SIZE', 8))
+    QUERY_BATCH_WINDOW_MS = int(os.environ.get('QUERY_BATCH_WINDOW_MS', 50))
+    QUERY_BATCH_MAX_CONCURRENCY = int(os.environ.get('QUERY_BATCH_MAX_CONCURRENCY', 4))
+    # Longest a request waits for its batched result (below gunicorn's 120 s worker timeout)
+    QUERY_TIMEOUT_SECONDS = float(os.environ.get('QUERY_TIMEOUT_SECONDS', 60))
+    MAX_QUESTIONS_PER_REQUEST = int(os.environ.get('MAX_QUESTIONS_PER_REQUEST', 20))
+    
+    # Generated SQL cache, keyed by normalized question and schema version
+    SQL_CACHE_MAX_SIZE = int(os.environ.get('SQL_CACHE_MAX_SIZE', 10000))
+    SQL_CACHE_TTL_SECONDS = int(os.environ.get('SQL_CACHE_TTL_SECONDS', 3600))
@@ -0,0 +1,44 @@
+# ============================================================================
+# gunicorn.conf.py (Production server configuration)
+# ============================================================================
+"""
+Production entry point:
+
+    gunicorn -c gunicorn.conf.py
+
+Gevent workers let requests waiting on OpenAI or SQLite overlap inside each
+worker process; each greenlet opens its own SQLite connection on demand.
+"""
+
+# Patch blocking I/O before anything imports sqlite3, socket or threading
+from gevent import monkey
+monkey.patch_all()
+
+import multiprocessing
+import os
+
+wsgi_app = 'app:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Worker processes
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gevent'
+worker_connections = 1000
+keepalive = 5
+
+# OpenAI calls can take a while; don't kill workers waiting on them
+timeout = 120
+graceful_timeout = 30
+
+# Logging
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+
+def worker_exit(server, worker):
+    """Release the worker's batcher and database connections"""
+    import app
+    if app.query_executor:
+        app.query_executor.shutdown()
+    if app.db_manager:
+        app.db_manager.close()
@@ -1,16 +1,87 @@
 # models/database.py
+import json
 import sqlite3
-from typing import Dict, List, Tuple, Optional, Any
+import threading
+from typing import Callable, Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass
 
-@dataclass
+# Sample rows in column-oriented form: shared column names plus row tuples
+SampleRows = Tuple[List[str], List[tuple]]
+
 class TableSchema:
-    """Represents database table schema information"""
-    name: str
-    columns: List[Dict[str, str]]
-    sample_data: List[Dict[str, Any]]
-    foreign_keys: List[Dict[str, str]]
-    description: str = ""
+    """
+    Represents database table schema information.
+    
+    Sample rows are stored as one column-name list shared by all rows plus
+    a list of value tuples. When built with a sample_loader instead of
+    sample_data, the sample query only runs the first time rows are read.
+    """
+    
+    def __init__(self, name: str, columns: List[Dict[str, str]],
+                 sample_data: Optional[List[Dict[str, Any]]] = None,
+                 foreign_keys: Optional[List[Dict[str, str]]] = None,
+                 description: str = "",
+                 sample_loader: Optional[Callable[[], SampleRows]] = None):
+        self.name = name
+        self.columns = columns
+        self.foreign_keys = foreign_keys if foreign_keys is not None else []
+        self.description = description
+        self._sample_data = sample_data
+        self._sample_loader = sample_loader
+        # Per-instance memos rather than cached_property, whose lock is
+        # shared by every instance and would serialize concurrent loads
+        self._loaded_samples: Optional[SampleRows] = None
+        self._sample_rows_json: Optional[List[str]] = None
+    
+    @property
+    def _samples(self) -> SampleRows:
+        """Sample rows, loaded on first access"""
+        samples = self._loaded_samples
+        if samples is None:
+            # Racing first reads may both load; they read the same rows
+            if self._sample_loader is not None:
+                samples = self._sample_loader()
+            else:
+                rows = self._sample_data or []
+                names = list(rows[0].keys()) if rows else []
+                samples = names, [tuple(row[name] for name in names) for row in rows]
+            self._loaded_samples = samples
+        return samples
+    
+    @property
+    def samples_loaded(self) -> bool:
+        """Whether sample rows have been read (reading them may run a query)"""
+        return self._loaded_samples is not None
+    
+    @property
+    def sample_columns(self) -> List[str]:
+        """Column names of the sample rows"""
+        return self._samples[0]
+    
+    @property
+    def sample_rows(self) -> List[tuple]:
+        """Sample rows as value tuples ordered like sample_columns"""
+        return self._samples[1]
+    
+    @property
+    def sample_data(self) -> List[Dict[str, Any]]:
+        """Sample rows as dicts (built on each access)"""
+        names, rows = self._samples
+        return [dict(zip(names, row)) for row in rows]
+    
+    @property
+    def sample_rows_json(self) -> List[str]:
+        """Sample rows pre-rendered as compact JSON objects for prompts"""
+        if self._sample_rows_json is None:
+            names, rows = self._samples
+            self._sample_rows_json = [
+                json.dumps(dict(zip(names, row)), separators=(',', ':'), ensure_ascii=False, default=str)
+                for row in rows
+            ]
+        return self._sample_rows_json
+    
+    def __repr__(self) -> str:
+        return f"TableSchema(name={self.name!r}, columns={len(self.columns)}, foreign_keys={len(self.foreign_keys)})"
 
 @dataclass
 class ColumnDescription:
@@ -24,31 +95,147 @@ class ColumnDescription:
 class DatabaseManager:
     """Handles database connections and operations"""
     
+    # Applied once to every new connection. WAL lets writers and readers
+    # proceed concurrently; the rest keep the working set in memory.
+    CONNECTION_PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA cache_size=-65536",
+        # Long-lived connection: let SQLite refresh planner statistics that
+        # are missing or stale (0x10000 checks every table up front)
+        "PRAGMA optimize=0x10002",
+    )
+    # Prepared statements kept per connection, keyed on SQL text; sized for
+    # the fixed introspection/metadata queries plus recent generated SQL
+    STATEMENT_CACHE_SIZE = 256
+    
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self._connection = None
+        # Each worker thread gets its own connection so concurrent reads
+        # don't serialize on a single connection's mutex
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        # Released connections wait here for the next thread, so requests
+        # reuse open connections (and their warm page caches)
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        # Bumped by close() so threads drop connections closed under them
+        self._generation = 0
     
     @property
-    def connection(self):
-        if self._connection is None:
-            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
-            self._connection.row_factory = sqlite3.Row
-        return self._connection
+    def connection(self) -> sqlite3.Connection:
+        """Get the calling thread's connection, taking one from the pool on first use"""
+        conn = getattr(self._local, 'connection', None)
+        if conn is None or self._local.generation != self._generation:
+            if conn is not None:
+                # Left open by close() while this thread was using it
+                self._discard(conn)
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+                generation = self._generation
+            if conn is None:
+                conn = self._connect()
+                with self._lock:
+                    self._connections.append(conn)
+            self._local.connection = conn
+            self._local.generation = generation
+        return conn
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection to the database"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in self.CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def release(self):
+        """Return the calling thread's connection to the pool, if it has one"""
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            return
+        self._local.connection = None
+        with self._lock:
+            if self._local.generation == self._generation:
+                self._idle.append(conn)
+                return
+        # Checked out before the last close(), which left it to this thread
+        self._discard(conn)
     
     def close(self):
-        if self._connection:
-            self._connection.close()
-            self._connection = None
+        """
+        Close idle connections and the calling thread's own.
+        
+        Connections other threads are using are left open so in-flight
+        queries finish; each thread closes its own on its next release()
+        or connection access, once it sees the generation has moved.
+        """
+        own = getattr(self._local, 'connection', None)
+        with self._lock:
+            connections, self._idle = self._idle, []
+            if own is not None:
+                connections.append(own)
+            self._connections = [conn for conn in self._connections if conn not in connections]
+            self._generation += 1
+        for conn in connections:
+            self._close_connection(conn)
+        self._local.connection = None
+    
+    def _discard(self, conn: sqlite3.Connection):
+        """Close a connection checked out before the last close()"""
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        self._close_connection(conn)
+    
+    def _close_connection(self, conn: sqlite3.Connection):
+        """Close a connection, first saving its planner statistics"""
+        try:
+            # Record what this connection learned for the query planner
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        conn.close()
     
     def execute_query(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
         """Execute a query and return results"""
+        return self.connection.execute(query, params).fetchall()
+    
+    def execute_query_columnar(self, query: str, params: tuple = (), limit: Optional[int] = None,
+                               chunk_size: int = 10_000) -> Tuple[List[str], List[List[Any]]]:
+        """
+        Execute a query and return results column-oriented.
+        
+        Returns the column names and one list of values per column, in the
+        same order (names may repeat, e.g. a.id and b.id). At most limit
+        rows are fetched when a limit is given.
+        """
         cursor = self.connection.cursor()
         cursor.execute(query, params)
-        return cursor.fetchall()
+        names = [description[0] for description in cursor.description] if cursor.description else []
+        columns: List[List[Any]] = [[] for _ in names]
+        remaining = limit
+        while remaining is None or remaining > 0:
+            chunk = cursor.fetchmany(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            # Transpose each chunk so values are appended a column at a time
+            for values, chunk_values in zip(columns, zip(*chunk)):
+                values.extend(chunk_values)
+        return names, columns
     
     def execute_write(self, query: str, params: tuple = ()) -> int:
         """Execute a write query and return affected rows"""
-        cursor = self.connection.cursor()
+        conn = self.connection
+        cursor = conn.cursor()
         cursor.execute(query, params)
-        self.connection.commit()
-        return cursor.rowcount
\ No newline at end of file
+        conn.commit()
+        return cursor.rowcount
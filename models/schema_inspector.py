@@ -1,11 +1,61 @@
-from typing import Dict, List
-from .database import DatabaseManager, TableSchema, ColumnDescription
+from collections import defaultdict
+from functools import partial
+from typing import Any, Dict, List, Optional
+from .database import DatabaseManager, TableSchema, ColumnDescription, SampleRows
 
 class SchemaInspector:
     """Handles database schema introspection and metadata extraction"""
     
+    # Bulk introspection queries: one round-trip per kind for every table
+    ALL_COLUMNS_QUERY = """
+    SELECT m.name AS table_name, p.name, p.type, p."notnull", p.dflt_value, p.pk
+    FROM sqlite_master m JOIN pragma_table_info(m.name) p
+    WHERE m.type='table' AND m.name NOT LIKE 'sqlite_%'
+    """
+    ALL_FOREIGN_KEYS_QUERY = """
+    SELECT m.name AS table_name, f.seq, f."table", f."from", f."to"
+    FROM sqlite_master m JOIN pragma_foreign_key_list(m.name) f
+    WHERE m.type='table' AND m.name NOT LIKE 'sqlite_%'
+    """
+    # Single-table variants; the table name is bound, so one prepared
+    # statement serves every table
+    TABLE_COLUMNS_QUERY = """
+    SELECT cid, name, type, "notnull", dflt_value, pk FROM pragma_table_info(?)
+    """
+    TABLE_FOREIGN_KEYS_QUERY = """
+    SELECT id, seq, "table", "from", "to" FROM pragma_foreign_key_list(?)
+    """
+    
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
+        # Introspection results are cached until SQLite's schema cookie changes
+        self._cached_schema_version: Optional[int] = None
+        self._cached_context: Optional[Dict[str, any]] = None
+        self._table_schema_cache: Dict[str, TableSchema] = {}
+    
+    def get_schema_version(self) -> int:
+        """Get SQLite's schema cookie, which is bumped by every DDL statement"""
+        rows = self.db_manager.execute_query("PRAGMA schema_version")
+        return rows[0][0]
+    
+    def _sync_schema_version(self):
+        """Drop cached introspection results if the schema has changed"""
+        version = self.get_schema_version()
+        if version != self._cached_schema_version:
+            self._cached_context = None
+            self._table_schema_cache = {}
+            self._cached_schema_version = version
+    
+    def invalidate(self):
+        """
+        Drop all cached introspection results.
+        
+        Metadata and sample row changes do not bump the schema cookie, so
+        callers refreshing the schema explicitly should call this first.
+        """
+        self._cached_schema_version = None
+        self._cached_context = None
+        self._table_schema_cache = {}
     
     def get_all_tables(self) -> List[str]:
         """Get all table names from the database"""
@@ -15,36 +65,17 @@ class SchemaInspector:
     
     def get_table_schema(self, table_name: str) -> TableSchema:
         """Get complete schema information for a table"""
-        # Get column information
-        query = f"PRAGMA table_info({table_name})"
-        column_rows = self.db_manager.execute_query(query)
-        
-        columns = []
-        for row in column_rows:
-            columns.append({
-                'name': row['name'],
-                'type': row['type'],
-                'nullable': not row['notnull'],
-                'primary_key': bool(row['pk']),
-                'default_value': row['dflt_value']
-            })
-        
-        # Get foreign key information
-        fk_query = f"PRAGMA foreign_key_list({table_name})"
-        fk_rows = self.db_manager.execute_query(fk_query)
-        
-        foreign_keys = []
-        for row in fk_rows:
-            foreign_keys.append({
-                'column': row['from'],
-                'referenced_table': row['table'],
-                'referenced_column': row['to']
-            })
-        
-        # Get sample data (first 3 rows)
-        sample_query = f"SELECT * FROM {table_name} LIMIT 3"
-        sample_rows = self.db_manager.execute_query(sample_query)
-        sample_data = [dict(row) for row in sample_rows]
+        self._sync_schema_version()
+        schema = self._table_schema_cache.get(table_name)
+        if schema is None:
+            schema = self._load_table_schema(table_name)
+            self._table_schema_cache[table_name] = schema
+        return schema
+    
+    def _load_table_schema(self, table_name: str) -> TableSchema:
+        """Load schema information for a single table from the database"""
+        column_rows = self.db_manager.execute_query(self.TABLE_COLUMNS_QUERY, (table_name,))
+        fk_rows = self.db_manager.execute_query(self.TABLE_FOREIGN_KEYS_QUERY, (table_name,))
         
         # Get table description if exists
         desc_query = """
@@ -59,12 +90,69 @@ class SchemaInspector:
         
         return TableSchema(
             name=table_name,
-            columns=columns,
-            sample_data=sample_data,
-            foreign_keys=foreign_keys,
-            description=description
+            columns=[self._column_from_row(row) for row in column_rows],
+            foreign_keys=[self._foreign_key_from_row(row) for row in fk_rows],
+            description=description,
+            sample_loader=partial(self._get_sample_data, table_name)
         )
     
+    def _load_all_table_schemas(self, tables: List[str]) -> Dict[str, TableSchema]:
+        """Load schema information for all tables with one query per kind"""
+        columns = defaultdict(list)
+        for row in self.db_manager.execute_query(self.ALL_COLUMNS_QUERY):
+            columns[row[0]].append(self._column_from_row(row))
+        
+        foreign_keys = defaultdict(list)
+        for row in self.db_manager.execute_query(self.ALL_FOREIGN_KEYS_QUERY):
+            foreign_keys[row[0]].append(self._foreign_key_from_row(row))
+        
+        try:
+            desc_rows = self.db_manager.execute_query(
+                "SELECT table_name, description FROM table_descriptions"
+            )
+            descriptions = dict(desc_rows)
+        except:
+            descriptions = {}
+        
+        return {
+            table: TableSchema(
+                name=table,
+                columns=columns[table],
+                foreign_keys=foreign_keys[table],
+                description=descriptions.get(table, ""),
+                sample_loader=partial(self._get_sample_data, table)
+            )
+            for table in tables
+        }
+    
+    @staticmethod
+    def _column_from_row(row) -> Dict[str, Any]:
+        """Build a column dict from a table_info row (cid, name, type, notnull, dflt_value, pk)"""
+        _, name, type_, notnull, dflt_value, pk = row
+        return {
+            'name': name,
+            'type': type_,
+            'nullable': not notnull,
+            'primary_key': bool(pk),
+            'default_value': dflt_value
+        }
+    
+    @staticmethod
+    def _foreign_key_from_row(row) -> Dict[str, str]:
+        """Build a foreign key dict from a foreign_key_list row (id, seq, table, from, to, ...)"""
+        _, _, table, from_, to = row[:5]
+        return {
+            'column': from_,
+            'referenced_table': table,
+            'referenced_column': to
+        }
+    
+    def _get_sample_data(self, table_name: str) -> SampleRows:
+        """Get sample data (first 3 rows) as column names plus row tuples"""
+        cursor = self.db_manager.connection.execute(f"SELECT * FROM {table_name} LIMIT 3")
+        names = [column[0] for column in cursor.description]
+        return names, [tuple(row) for row in cursor.fetchall()]
+    
     def get_column_descriptions(self, table_name: str = None) -> List[ColumnDescription]:
         """Get column descriptions from metadata table"""
         query = """
@@ -81,30 +169,41 @@ class SchemaInspector:
             rows = self.db_manager.execute_query(query, params)
             return [
                 ColumnDescription(
-                    table_name=row['table_name'],
-                    column_name=row['column_name'],
-                    description=row['description'],
-                    business_meaning=row['business_meaning'] or "",
-                    data_examples=row['data_examples'] or ""
+                    table_name=table_name,
+                    column_name=column_name,
+                    description=description,
+                    business_meaning=business_meaning or "",
+                    data_examples=data_examples or ""
                 )
-                for row in rows
+                for table_name, column_name, description, business_meaning, data_examples in rows
             ]
         except:
             return []
     
+    def get_all_column_descriptions(self) -> Dict[str, List[ColumnDescription]]:
+        """Get column descriptions for every table in one query, grouped by table"""
+        grouped = defaultdict(list)
+        for cd in self.get_column_descriptions():
+            grouped[cd.table_name].append(cd)
+        return grouped
+    
     def get_database_context(self) -> Dict[str, any]:
         """Get complete database context for prompt generation"""
+        self._sync_schema_version()
+        if self._cached_context is not None:
+            return self._cached_context
+        
         tables = self.get_all_tables()
-        schemas = {}
-        column_descriptions = {}
+        schemas = self._load_all_table_schemas(tables)
+        self._table_schema_cache.update(schemas)
         
-        for table in tables:
-            schemas[table] = self.get_table_schema(table)
-            column_descriptions[table] = self.get_column_descriptions(table)
+        all_descriptions = self.get_all_column_descriptions()
+        column_descriptions = {table: all_descriptions.get(table, []) for table in tables}
         
-        return {
+        self._cached_context = {
             'tables': tables,
             'schemas': schemas,
             'column_descriptions': column_descriptions,
             'total_tables': len(tables)
-        }
\ No newline at end of file
+        }
+        return self._cached_context
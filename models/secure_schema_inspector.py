@@ -2,18 +2,80 @@
 """
 Secure schema inspector that uses mock sample tables for PCI/MNPI compliance
 """
-from typing import Dict, List
-from .database import DatabaseManager, TableSchema, ColumnDescription
+import re
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Set
+from .database import DatabaseManager, TableSchema, ColumnDescription, SampleRows
+from .schema_inspector import SchemaInspector
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Table name in a CREATE TABLE statement as stored in sqlite_master
+_CREATE_TABLE_NAME_RE = re.compile(
+    r'\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?'
+    r'("[^"]+"|`[^`]+`|\[[^\]]+\]|[^\s(]+)',
+    re.IGNORECASE
+)
+
 class SecureSchemaInspector:
     """Schema inspector that uses mock sample tables for data privacy"""
     
+    # Worker threads used to read mock sample rows when the context loads
+    SAMPLE_PREFETCH_WORKERS = 8
+    # Mock rows shown per table in prompts
+    MOCK_SAMPLE_ROWS = 2
+    
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
         self.mock_suffix = "_sample"  # Configurable suffix for mock tables
+        # Introspection results are cached until SQLite's schema cookie changes
+        self._cached_schema_version: Optional[int] = None
+        self._cached_context: Optional[Dict[str, any]] = None
+        self._column_descriptions_cache: Dict[Optional[str], List[ColumnDescription]] = {}
+        # Every table name (real, mock and metadata) from the last get_all_tables()
+        self._all_tables_set: Optional[Set[str]] = None
+        self._detect_metadata_tables()
+    
+    def _detect_metadata_tables(self):
+        """Record which optional metadata tables exist, so lookups can skip missing ones"""
+        rows = self.db_manager.execute_query(
+            "SELECT name FROM sqlite_master WHERE type='table' "
+            "AND name IN ('table_descriptions', 'column_descriptions')"
+        )
+        names = {row['name'] for row in rows}
+        self._has_table_descriptions = 'table_descriptions' in names
+        self._has_column_descriptions = 'column_descriptions' in names
+    
+    def get_schema_version(self) -> int:
+        """Get SQLite's schema cookie, which is bumped by every DDL statement"""
+        rows = self.db_manager.execute_query("PRAGMA schema_version")
+        return rows[0][0]
+    
+    def _sync_schema_version(self):
+        """Drop cached introspection results if the schema has changed"""
+        version = self.get_schema_version()
+        if version != self._cached_schema_version:
+            self._cached_context = None
+            self._column_descriptions_cache = {}
+            self._all_tables_set = None
+            self._detect_metadata_tables()
+            self._cached_schema_version = version
+    
+    def invalidate(self):
+        """
+        Drop all cached introspection results.
+        
+        Metadata and mock row changes do not bump the schema cookie, so
+        callers refreshing the schema explicitly should call this first.
+        """
+        self._cached_schema_version = None
+        self._cached_context = None
+        self._column_descriptions_cache = {}
+        self._all_tables_set = None
     
     def get_all_tables(self) -> List[str]:
         """Get all non-sample table names from the database"""
@@ -22,6 +84,7 @@ class SecureSchemaInspector:
         
         # Filter out sample tables and metadata tables
         all_tables = [row['name'] for row in rows]
+        self._all_tables_set = set(all_tables)
         real_tables = [
             table for table in all_tables 
             if not table.endswith(self.mock_suffix) 
@@ -37,74 +100,169 @@ class SecureSchemaInspector:
     
     def check_mock_table_exists(self, real_table_name: str) -> bool:
         """Check if a mock table exists for the given real table"""
-        mock_table = self.get_mock_table_name(real_table_name)
-        query = "SELECT name FROM sqlite_master WHERE type='table' AND name = ?"
-        rows = self.db_manager.execute_query(query, (mock_table,))
-        return len(rows) > 0
+        if self._all_tables_set is None:
+            self.get_all_tables()
+        return self.get_mock_table_name(real_table_name) in self._all_tables_set
     
     def get_table_schema(self, table_name: str) -> TableSchema:
         """Get complete schema information for a table using mock data"""
+        self._sync_schema_version()
         
         # Get column information from the REAL table
-        query = f"PRAGMA table_info({table_name})"
-        column_rows = self.db_manager.execute_query(query)
-        
-        columns = []
-        for row in column_rows:
-            columns.append({
-                'name': row['name'],
-                'type': row['type'],
-                'nullable': not row['notnull'],
-                'primary_key': bool(row['pk']),
-                'default_value': row['dflt_value']
-            })
+        column_rows = self.db_manager.execute_query(SchemaInspector.TABLE_COLUMNS_QUERY, (table_name,))
+        
+        columns = [SchemaInspector._column_from_row(row) for row in column_rows]
         
         # Get foreign key information from the REAL table
-        fk_query = f"PRAGMA foreign_key_list({table_name})"
-        fk_rows = self.db_manager.execute_query(fk_query)
-        
-        foreign_keys = []
-        for row in fk_rows:
-            foreign_keys.append({
-                'column': row['from'],
-                'referenced_table': row['table'],
-                'referenced_column': row['to']
-            })
-        
-        # Get sample data from the MOCK table (or empty if doesn't exist)
-        sample_data = []
-        mock_table_name = self.get_mock_table_name(table_name)
+        fk_rows = self.db_manager.execute_query(SchemaInspector.TABLE_FOREIGN_KEYS_QUERY, (table_name,))
         
-        if self.check_mock_table_exists(table_name):
-            try:
-                sample_query = f"SELECT * FROM {mock_table_name} LIMIT 5"
-                sample_rows = self.db_manager.execute_query(sample_query)
-                sample_data = [dict(row) for row in sample_rows]
-                logger.info(f"Loaded {len(sample_data)} mock sample rows from {mock_table_name}")
-            except Exception as e:
-                logger.warning(f"Could not load sample data from {mock_table_name}: {e}")
-                sample_data = []
-        else:
-            logger.warning(f"Mock table {mock_table_name} not found - no sample data will be provided")
+        foreign_keys = [SchemaInspector._foreign_key_from_row(row) for row in fk_rows]
         
         # Get table description if exists
-        desc_query = "SELECT description FROM table_descriptions WHERE table_name = ?"
-        try:
-            desc_rows = self.db_manager.execute_query(desc_query, (table_name,))
-            description = desc_rows[0]['description'] if desc_rows else ""
-        except:
-            description = ""
+        description = ""
+        if self._has_table_descriptions:
+            desc_query = "SELECT description FROM table_descriptions WHERE table_name = ?"
+            try:
+                desc_rows = self.db_manager.execute_query(desc_query, (table_name,))
+                description = desc_rows[0]['description'] if desc_rows else ""
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Could not read table description for {table_name}: {e}")
+        
+        # Sample data comes from the MOCK table, read on first use
+        has_mock = self.check_mock_table_exists(table_name)
+        mock_columns = set()
+        if has_mock:
+            mock_column_rows = self.db_manager.execute_query(
+                SchemaInspector.TABLE_COLUMNS_QUERY, (self.get_mock_table_name(table_name),)
+            )
+            mock_columns = {row[1] for row in mock_column_rows}
         
         return TableSchema(
             name=table_name,
             columns=columns,
-            sample_data=sample_data,
             foreign_keys=foreign_keys,
-            description=description
+            description=description,
+            sample_loader=partial(
+                self._get_mock_sample_data,
+                table_name,
+                has_mock,
+                self._shared_column_names(columns, mock_columns)
+            )
         )
     
+    @staticmethod
+    def _shared_column_names(columns: List[Dict[str, Any]], mock_columns: Set[str]) -> List[str]:
+        """Only the real table's columns that the mock table also has, in real table order"""
+        return [column['name'] for column in columns if column['name'] in mock_columns]
+    
+    def _load_all_table_schemas(self, tables: List[str], mock_tables: Set[str]) -> Dict[str, TableSchema]:
+        """Load schema information for all tables with one query per kind"""
+        columns = defaultdict(list)
+        for row in self.db_manager.execute_query(SchemaInspector.ALL_COLUMNS_QUERY):
+            columns[row[0]].append(SchemaInspector._column_from_row(row))
+        mock_columns = {
+            mock_table: {column['name'] for column in columns[mock_table]}
+            for mock_table in mock_tables
+        }
+        
+        foreign_keys = defaultdict(list)
+        for row in self.db_manager.execute_query(SchemaInspector.ALL_FOREIGN_KEYS_QUERY):
+            foreign_keys[row[0]].append(SchemaInspector._foreign_key_from_row(row))
+        
+        descriptions = {}
+        if self._has_table_descriptions:
+            try:
+                desc_rows = self.db_manager.execute_query(
+                    "SELECT table_name, description FROM table_descriptions"
+                )
+                descriptions = dict(desc_rows)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Could not read table descriptions: {e}")
+        
+        return {
+            table: TableSchema(
+                name=table,
+                columns=columns[table],
+                foreign_keys=foreign_keys[table],
+                description=descriptions.get(table, ""),
+                sample_loader=partial(
+                    self._get_mock_sample_data,
+                    table,
+                    self.get_mock_table_name(table) in mock_tables,
+                    self._shared_column_names(
+                        columns[table], mock_columns.get(self.get_mock_table_name(table), set())
+                    )
+                )
+            )
+            for table in tables
+        }
+    
+    def _prefetch_samples(self, schemas: List[TableSchema]):
+        """Load mock sample rows for many tables concurrently"""
+        if len(schemas) < 2:
+            return
+        
+        def load(schema: TableSchema):
+            try:
+                # Each worker thread reads through its own connection
+                schema.sample_rows
+            finally:
+                self.db_manager.release()
+        
+        workers = min(self.SAMPLE_PREFETCH_WORKERS, len(schemas))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='schema-samples') as executor:
+            list(executor.map(load, schemas))
+    
+    def get_mock_tables(self) -> Set[str]:
+        """Get the names of all mock sample tables"""
+        if self._all_tables_set is None:
+            self.get_all_tables()
+        return {name for name in self._all_tables_set if name.endswith(self.mock_suffix)}
+    
+    def _get_mock_sample_data(self, table_name: str, has_mock: Optional[bool] = None,
+                              column_names: Optional[List[str]] = None) -> SampleRows:
+        """
+        Get sample data from the MOCK table (or empty if doesn't exist).
+        
+        Only column_names are selected when given; the names come from the
+        schema, never from user input.
+        """
+        mock_table_name = self.get_mock_table_name(table_name)
+        
+        if has_mock is None:
+            has_mock = self.check_mock_table_exists(table_name)
+        if not has_mock:
+            logger.warning(f"Mock table {mock_table_name} not found - no sample data will be provided")
+            return [], []
+        
+        try:
+            projection = ', '.join(
+                '"' + name.replace('"', '""') + '"' for name in column_names
+            ) if column_names else '*'
+            sample_query = f"SELECT {projection} FROM {mock_table_name} LIMIT {self.MOCK_SAMPLE_ROWS}"
+            cursor = self.db_manager.connection.execute(sample_query)
+            names = [column[0] for column in cursor.description]
+            sample_rows = [tuple(row) for row in cursor.fetchall()]
+            logger.info(f"Loaded {len(sample_rows)} mock sample rows from {mock_table_name}")
+            return names, sample_rows
+        except Exception as e:
+            logger.warning(f"Could not load sample data from {mock_table_name}: {e}")
+            return [], []
+    
     def get_column_descriptions(self, table_name: str = None) -> List[ColumnDescription]:
         """Get column descriptions from metadata table"""
+        self._sync_schema_version()
+        descriptions = self._column_descriptions_cache.get(table_name)
+        if descriptions is None:
+            descriptions = self._load_column_descriptions(table_name)
+            self._column_descriptions_cache[table_name] = descriptions
+        return descriptions
+    
+    def _load_column_descriptions(self, table_name: Optional[str]) -> List[ColumnDescription]:
+        """Load column descriptions for one table (or all tables) from the database"""
+        if not self._has_column_descriptions:
+            return []
+        
         query = """
         SELECT table_name, column_name, description, business_meaning, data_examples
         FROM column_descriptions
@@ -119,37 +277,55 @@ class SecureSchemaInspector:
             rows = self.db_manager.execute_query(query, params)
             return [
                 ColumnDescription(
-                    table_name=row['table_name'],
-                    column_name=row['column_name'],
-                    description=row['description'],
-                    business_meaning=row['business_meaning'] or "",
-                    data_examples=row['data_examples'] or ""
+                    table_name=table_name,
+                    column_name=column_name,
+                    description=description,
+                    business_meaning=business_meaning or "",
+                    data_examples=data_examples or ""
                 )
-                for row in rows
+                for table_name, column_name, description, business_meaning, data_examples in rows
             ]
-        except:
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Could not read column descriptions: {e}")
             return []
     
+    def get_all_column_descriptions(self) -> Dict[str, List[ColumnDescription]]:
+        """Get column descriptions for every table in one query, grouped by table"""
+        grouped = defaultdict(list)
+        for cd in self.get_column_descriptions():
+            grouped[cd.table_name].append(cd)
+        
+        # Later per-table lookups are served from the same query
+        for table_name, descriptions in grouped.items():
+            self._column_descriptions_cache.setdefault(table_name, descriptions)
+        return grouped
+    
     def get_database_context(self) -> Dict[str, any]:
         """Get complete database context using mock sample data"""
+        self._sync_schema_version()
+        if self._cached_context is not None:
+            return self._cached_context
+        
         tables = self.get_all_tables()
-        schemas = {}
-        column_descriptions = {}
+        mock_tables = self.get_mock_tables()
+        schemas = self._load_all_table_schemas(tables, mock_tables)
+        
+        all_descriptions = self.get_all_column_descriptions()
+        column_descriptions = {table: all_descriptions.get(table, []) for table in tables}
         
-        missing_mock_tables = []
+        # Every prompt shows every table's samples, so read them up front
+        self._prefetch_samples(list(schemas.values()))
         
-        for table in tables:
-            schemas[table] = self.get_table_schema(table)
-            column_descriptions[table] = self.get_column_descriptions(table)
-            
-            # Track tables without mock data
-            if not self.check_mock_table_exists(table):
-                missing_mock_tables.append(table)
+        # Track tables without mock data
+        missing_mock_tables = [
+            table for table in tables
+            if self.get_mock_table_name(table) not in mock_tables
+        ]
         
         if missing_mock_tables:
             logger.warning(f"Missing mock tables for: {missing_mock_tables}")
         
-        return {
+        self._cached_context = {
             'tables': tables,
             'schemas': schemas,
             'column_descriptions': column_descriptions,
@@ -157,35 +333,38 @@ class SecureSchemaInspector:
             'missing_mock_tables': missing_mock_tables,
             'security_mode': 'mock_samples'
         }
+        return self._cached_context
     
     def create_mock_table_template(self, real_table_name: str) -> str:
         """Generate SQL template for creating a mock table"""
         
-        # Get the real table structure
-        query = f"PRAGMA table_info({real_table_name})"
+        # Reuse the real table's DDL verbatim so constraints, generated
+        # columns and WITHOUT ROWID carry over to the mock table
         try:
-            column_rows = self.db_manager.execute_query(query)
-        except:
+            rows = self.db_manager.execute_query(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (real_table_name,)
+            )
+        except sqlite3.OperationalError:
+            rows = []
+        if not rows or not rows[0]['sql']:
             return f"-- Error: Could not access table {real_table_name}"
         
         mock_table_name = self.get_mock_table_name(real_table_name)
-        
-        # Generate CREATE TABLE statement
-        columns = []
-        for row in column_rows:
-            col_def = f"{row['name']} {row['type']}"
-            if row['notnull']:
-                col_def += " NOT NULL"
-            if row['dflt_value']:
-                col_def += f" DEFAULT {row['dflt_value']}"
-            if row['pk']:
-                col_def += " PRIMARY KEY"
-            columns.append(col_def)
+        real_sql = rows[0]['sql']
+        match = _CREATE_TABLE_NAME_RE.match(real_sql)
+        if not match:
+            return f"-- Error: Could not parse definition of table {real_table_name}"
+        name_token = match.group(1)
+        if name_token[0] in '"`[':
+            # Keep the original quoting around the mock name
+            name_token = name_token[0] + mock_table_name + name_token[-1]
+        else:
+            name_token = mock_table_name
+        mock_sql = real_sql[:match.start(1)] + name_token + real_sql[match.end(1):]
         
         create_sql = f"""-- Mock table for {real_table_name}
-        CREATE TABLE {mock_table_name} (
-            {','.join(chr(10) + '    ' + col for col in columns)}
-        );
+        {mock_sql};
 
         -- Sample INSERT statements (replace with your mock data)
         -- INSERT INTO {mock_table_name} VALUES (...);
@@ -0,0 +1,136 @@
+-- Seed rows for the sample database, run by setup_database.create_sample_database
+-- after SCHEMA_DDL and inside the same transaction
+
+-- Sample data for the real tables
+
+-- Categories
+INSERT OR IGNORE INTO categories (category_id, category_name, description, parent_category_id) VALUES
+    (1, 'Electronics', 'Electronic devices and gadgets', NULL),
+    (2, 'Clothing', 'Apparel and fashion items', NULL),
+    (3, 'Books', 'Books and educational materials', NULL),
+    (4, 'Smartphones', 'Mobile phones and accessories', 1),
+    (5, 'Laptops', 'Computers and laptops', 1);
+
+-- Users
+INSERT INTO users (username, email, first_name, last_name, date_joined, is_active, user_type) VALUES
+    ('john_doe', 'john@email.com', 'John', 'Doe', '2023-01-15', 1, 'customer'),
+    ('jane_smith', 'jane@email.com', 'Jane', 'Smith', '2023-02-20', 1, 'customer'),
+    ('admin_user', 'admin@company.com', 'Admin', 'User', '2023-01-01', 1, 'admin'),
+    ('vendor_abc', 'vendor@abc.com', 'ABC', 'Vendor', '2023-03-10', 1, 'vendor');
+
+-- Products
+INSERT INTO products (product_name, description, price, category_id, stock_quantity, is_active) VALUES
+    ('iPhone 15', 'Latest iPhone model', 999.99, 4, 50, 1),
+    ('MacBook Pro', 'Professional laptop', 1999.99, 5, 25, 1),
+    ('T-Shirt', 'Cotton t-shirt', 19.99, 2, 100, 1),
+    ('Python Book', 'Learn Python programming', 49.99, 3, 75, 1),
+    ('Samsung Galaxy', 'Android smartphone', 799.99, 4, 30, 1);
+
+-- Orders
+INSERT INTO orders (user_id, order_date, total_amount, status, shipping_address) VALUES
+    (1, '2024-06-01 10:00:00', 1019.98, 'delivered', '123 Main St'),
+    (2, '2024-06-15 14:30:00', 2049.98, 'shipped', '456 Oak Ave'),
+    (1, '2024-06-20 09:15:00', 49.99, 'pending', '123 Main St'),
+    (4, '2024-06-25 16:45:00', 819.98, 'processing', '789 Pine Rd');
+
+-- Order items
+INSERT INTO order_items (order_id, product_id, quantity, unit_price, total_price) VALUES
+    (1, 1, 1, 999.99, 999.99),
+    (1, 3, 1, 19.99, 19.99),
+    (2, 2, 1, 1999.99, 1999.99),
+    (2, 4, 1, 49.99, 49.99),
+    (3, 4, 1, 49.99, 49.99),
+    (4, 5, 1, 799.99, 799.99),
+    (4, 3, 1, 19.99, 19.99);
+
+-- Mock/fake data for the *_sample tables (PCI/MNPI safe), used as AI context
+
+-- Mock categories (safe, generic data)
+INSERT INTO categories_sample (category_id, category_name, description, parent_category_id) VALUES
+    (1, 'Tech_Demo', 'Demo technology products', NULL),
+    (2, 'Fashion_Test', 'Test fashion items', NULL),
+    (3, 'Media_Sample', 'Sample media content', NULL),
+    (4, 'Mobile_Mock', 'Mock mobile devices', 1),
+    (5, 'Computer_Demo', 'Demo computers', 1);
+
+-- Mock users (completely fictional)
+INSERT INTO users_sample (username, email, first_name, last_name, date_joined, is_active, user_type) VALUES
+    ('demo_user1', 'demo1@example.com', 'Alice', 'Demo', '2023-01-15', 1, 'customer'),
+    ('demo_user2', 'demo2@example.com', 'Bob', 'Test', '2023-02-20', 1, 'customer'),
+    ('demo_admin', 'admin@example.com', 'Demo', 'Admin', '2023-01-01', 1, 'admin'),
+    ('demo_vendor', 'vendor@example.com', 'Test', 'Vendor', '2023-03-10', 1, 'vendor'),
+    ('demo_inactive', 'inactive@example.com', 'Inactive', 'User', '2022-12-01', 0, 'customer');
+
+-- Mock products (safe product names and prices)
+INSERT INTO products_sample (product_name, description, price, category_id, stock_quantity, is_active) VALUES
+    ('Demo Phone X1', 'Sample smartphone for testing', 599.99, 4, 25, 1),
+    ('Test Laptop Pro', 'Demo laptop computer', 1299.99, 5, 15, 1),
+    ('Sample Shirt', 'Demo clothing item', 29.99, 2, 50, 1),
+    ('Mock Programming Guide', 'Test educational book', 39.99, 3, 100, 1),
+    ('Demo Tablet Z2', 'Sample tablet device', 399.99, 1, 30, 1),
+    ('Test Headphones', 'Demo audio device', 149.99, 1, 75, 1),
+    ('Sample Jeans', 'Demo denim pants', 79.99, 2, 40, 1);
+
+-- Mock orders (safe transaction data)
+INSERT INTO orders_sample (user_id, order_date, total_amount, status, shipping_address) VALUES
+    (1, '2024-01-15 10:30:00', 629.98, 'delivered', '123 Demo Street, Test City'),
+    (2, '2024-01-20 14:20:00', 1329.98, 'shipped', '456 Sample Ave, Mock Town'),
+    (3, '2024-02-01 09:15:00', 219.98, 'pending', '789 Example Blvd, Demo City'),
+    (1, '2024-02-10 16:45:00', 149.99, 'processing', '123 Demo Street, Test City'),
+    (4, '2024-02-15 11:30:00', 79.99, 'cancelled', '321 Test Lane, Sample City');
+
+-- Mock order items (corresponding to mock orders)
+INSERT INTO order_items_sample (order_id, product_id, quantity, unit_price, total_price) VALUES
+    (1, 1, 1, 599.99, 599.99),  -- Demo Phone X1
+    (1, 3, 1, 29.99, 29.99),  -- Sample Shirt
+    (2, 2, 1, 1299.99, 1299.99),  -- Test Laptop Pro
+    (2, 3, 1, 29.99, 29.99),  -- Sample Shirt
+    (3, 6, 1, 149.99, 149.99),  -- Test Headphones
+    (3, 7, 1, 79.99, 79.99),  -- Sample Jeans
+    (4, 6, 1, 149.99, 149.99),  -- Test Headphones
+    (5, 7, 1, 79.99, 79.99);  -- Sample Jeans (cancelled order)
+
+-- Table and column descriptions
+
+-- Table descriptions
+INSERT INTO table_descriptions (table_name, description) VALUES
+    ('users', 'Contains information about all users in the system including customers, admins, and vendors'),
+    ('categories', 'Product categories with hierarchical structure supporting parent-child relationships'),
+    ('products', 'Product catalog with pricing, inventory, and category information'),
+    ('orders', 'Customer orders with status tracking and delivery information'),
+    ('order_items', 'Individual items within each order with pricing and quantity details');
+
+-- Column descriptions (for all real tables)
+INSERT INTO column_descriptions (table_name, column_name, description, business_meaning, data_examples) VALUES
+    ('users', 'user_id', 'Unique identifier for each user', 'Primary key for user records', '1, 2, 3'),
+    ('users', 'username', 'Unique username for login', 'User''s chosen login name', 'john_doe, jane_smith'),
+    ('users', 'email', 'User''s email address', 'Contact email and alternate login method', 'john@email.com'),
+    ('users', 'first_name', 'User''s first name', 'Given name for personalization', 'John, Jane'),
+    ('users', 'last_name', 'User''s last name', 'Family name for full identification', 'Doe, Smith'),
+    ('users', 'date_joined', 'Date when user registered', 'Account creation timestamp', '2023-01-15'),
+    ('users', 'is_active', 'Whether user account is active', 'Account status flag', '1 (active), 0 (inactive)'),
+    ('users', 'user_type', 'Type of user account', 'Role-based access control', 'customer, admin, vendor'),
+    ('categories', 'category_id', 'Unique identifier for category', 'Primary key for categories', '1, 2, 3'),
+    ('categories', 'category_name', 'Name of the category', 'Display name for product grouping', 'Electronics, Clothing'),
+    ('categories', 'description', 'Category description', 'Detailed explanation of category', 'Electronic devices and gadgets'),
+    ('categories', 'parent_category_id', 'Parent category reference', 'Enables hierarchical categories', '1 (Electronics parent of Smartphones)'),
+    ('products', 'product_id', 'Unique identifier for product', 'Primary key for products', '1, 2, 3'),
+    ('products', 'product_name', 'Name of the product', 'Display name for catalog', 'iPhone 15, MacBook Pro'),
+    ('products', 'description', 'Product description', 'Detailed product information', 'Latest iPhone model'),
+    ('products', 'price', 'Product price in USD', 'Current selling price', '999.99, 19.99'),
+    ('products', 'category_id', 'Category reference', 'Links product to category', '4 (Smartphones)'),
+    ('products', 'stock_quantity', 'Available inventory', 'Current stock level', '50, 100, 0'),
+    ('products', 'created_at', 'Product creation date', 'When product was added', '2024-01-15 10:30:00'),
+    ('products', 'is_active', 'Product availability status', 'Whether product is currently sold', '1 (available), 0 (discontinued)'),
+    ('orders', 'order_id', 'Unique identifier for order', 'Primary key for orders', '1, 2, 3'),
+    ('orders', 'user_id', 'Customer reference', 'Links order to customer', '1 (john_doe''s orders)'),
+    ('orders', 'order_date', 'When order was placed', 'Order creation timestamp', '2024-06-01 10:00:00'),
+    ('orders', 'total_amount', 'Total order value', 'Sum of all items plus tax/shipping', '1019.98, 49.99'),
+    ('orders', 'status', 'Current order status', 'Order processing stage', 'pending, shipped, delivered'),
+    ('orders', 'shipping_address', 'Delivery address', 'Where order should be sent', '123 Main St, Apt 4B'),
+    ('order_items', 'order_item_id', 'Unique identifier for order line', 'Primary key for order items', '1, 2, 3'),
+    ('order_items', 'order_id', 'Order reference', 'Links item to specific order', '1 (items in order #1)'),
+    ('order_items', 'product_id', 'Product reference', 'Links to specific product', '1 (iPhone 15)'),
+    ('order_items', 'quantity', 'Number of items ordered', 'How many units purchased', '1, 2, 5'),
+    ('order_items', 'unit_price', 'Price per item', 'Individual item cost at time of order', '999.99, 19.99'),
+    ('order_items', 'total_price', 'Total for this line item', 'quantity * unit_price', '999.99, 39.98');
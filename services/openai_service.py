@@ -2,8 +2,12 @@
 # ============================================================================
 # services/openai_service.py (New file for OpenAI integration)
 # ============================================================================
+import json
+import re
+import time
+import httpx
 import openai
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import logging
 from config import Config
 
@@ -11,20 +15,90 @@ from config import Config
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SQL_SYSTEM_PROMPT = "You are an expert SQL query generator. You convert natural language questions into valid SQLite queries. Always respond with ONLY the SQL query, no explanations or markdown formatting."
+BATCH_SQL_SYSTEM_PROMPT = "You are an expert SQL query generator. You convert natural language questions into valid SQLite queries. Always respond with ONLY a JSON array of SQL query strings, no explanations or markdown formatting."
+
+# Markdown fence some models wrap around the batched JSON array
+_JSON_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+class SQLStreamCollector:
+    """
+    Accumulates a streamed SQL response and reports when it is complete.
+    
+    A response fenced in a markdown code block is complete once the closing
+    fence arrives; anything after it is explanation we would strip anyway.
+    Only newly received text is scanned, so each chunk costs O(chunk).
+    """
+    
+    FENCE = "```"
+    
+    def __init__(self):
+        self._parts: List[str] = []
+        self._tail = ""
+        self._fences = 0
+    
+    def feed(self, text: str) -> bool:
+        """Add a chunk of content; returns True once the SQL is complete"""
+        self._parts.append(text)
+        # Keep a short tail so fences split across chunks are still seen
+        window = self._tail + text
+        self._fences += window.count(self.FENCE)
+        self._tail = window[-(len(self.FENCE) - 1):] if not window.endswith(self.FENCE) else ""
+        return self._fences >= 2
+    
+    @property
+    def content(self) -> str:
+        return "".join(self._parts).strip()
+
 class OpenAIService:
     """Service for interacting with OpenAI API"""
     
+    HTTP_TIMEOUT = 30
+    HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+    # How long a successful connection test (or completion) is trusted
+    CONNECTION_OK_TTL = 300
+    # How long a failed connection test is reported without probing again
+    CONNECTION_FAIL_TTL = 30
+    
     def __init__(self):
         if not Config.OPENAI_API_KEY:
             raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY in your .env file")
         
-        openai.api_key = Config.OPENAI_API_KEY
+        # Long-lived HTTP/2 clients keep TLS connections to the API open, so
+        # requests multiplex over a few warm sockets instead of handshaking
+        self.http_client = httpx.Client(
+            http2=True,
+            timeout=self.HTTP_TIMEOUT,
+            limits=self.HTTP_LIMITS
+        )
+        self.client = openai.OpenAI(api_key=Config.OPENAI_API_KEY, http_client=self.http_client)
+        # Async client lets many generation calls wait on one event loop
+        # instead of each pinning a worker thread
+        self.async_http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=self.HTTP_TIMEOUT,
+            limits=self.HTTP_LIMITS
+        )
+        self.async_client = openai.AsyncOpenAI(api_key=Config.OPENAI_API_KEY, http_client=self.async_http_client)
         self.model = Config.OPENAI_MODEL
         self.temperature = Config.OPENAI_TEMPERATURE
         self.max_tokens = Config.OPENAI_MAX_TOKENS
+        # Monotonic time of the last successful API call (0 = never)
+        self._last_ok_ts = 0.0
+        # Monotonic time of the last failed connection test (0 = never)
+        self._last_fail_ts = 0.0
         
         logger.info(f"OpenAI service initialized with model: {self.model}")
     
+    def close(self):
+        """Close the sync client's HTTP connections"""
+        self.client.close()
+    
+    async def aclose(self):
+        """Close both clients' HTTP connections; await on the loop the async client ran on"""
+        self.close()
+        await self.async_client.close()
+    
     def generate_sql(self, prompt: str) -> Optional[str]:
         """
         Generate SQL query using OpenAI API
@@ -35,58 +109,203 @@ class OpenAIService:
         Returns:
             str: Generated SQL query or None if error
         """
+        sql_query = self._stream_sql(prompt)
+        if sql_query is not None:
+            logger.info(f"Generated SQL: {sql_query}")
+        return sql_query
+    
+    async def agenerate_sql(self, prompt: str) -> Optional[str]:
+        """Async variant of generate_sql"""
+        sql_query = await self._astream_sql(prompt)
+        if sql_query is not None:
+            logger.info(f"Generated SQL: {sql_query}")
+        return sql_query
+    
+    def generate_sql_batch(self, prompt: str, expected_count: int) -> Optional[List[str]]:
+        """
+        Generate several SQL queries with a single OpenAI API call
+        
+        Args:
+            prompt (str): A batch prompt listing numbered questions
+            expected_count (int): Number of questions in the prompt
+            
+        Returns:
+            list: One generated SQL query per question, or None if the call
+            failed or the response could not be matched to the questions
+        """
+        content = self._complete(
+            BATCH_SQL_SYSTEM_PROMPT,
+            prompt,
+            max_tokens=self.max_tokens * expected_count
+        )
+        return self._parse_batch_response(content, expected_count)
+    
+    async def agenerate_sql_batch(self, prompt: str, expected_count: int) -> Optional[List[str]]:
+        """Async variant of generate_sql_batch"""
+        content = await self._acomplete(
+            BATCH_SQL_SYSTEM_PROMPT,
+            prompt,
+            max_tokens=self.max_tokens * expected_count
+        )
+        return self._parse_batch_response(content, expected_count)
+    
+    def _parse_batch_response(self, content: Optional[str], expected_count: int) -> Optional[List[str]]:
+        """Parse a batched response into one SQL string per question"""
+        if content is None:
+            return None
+        
+        content = _JSON_FENCE_RE.sub('', content.strip())
+        try:
+            queries = json.loads(content)
+        except json.JSONDecodeError as e:
+            logger.error(f"Could not parse batched OpenAI response as JSON: {e}")
+            return None
+        
+        if (not isinstance(queries, list) or len(queries) != expected_count
+                or not all(isinstance(q, str) for q in queries)):
+            logger.error(f"Batched OpenAI response did not contain {expected_count} SQL strings")
+            return None
+        
+        logger.info(f"Generated {len(queries)} SQL queries in one batch")
+        return queries
+    
+    def _completion_request(self, system_prompt: str, prompt: str, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Build the keyword arguments for a chat completion request"""
+        return {
+            'model': self.model,
+            'messages': [
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            'temperature': self.temperature,
+            'max_tokens': max_tokens or self.max_tokens,
+            'top_p': 1,
+            'frequency_penalty': 0,
+            'presence_penalty': 0
+        }
+    
+    def _response_content(self, response) -> Optional[str]:
+        """Extract the response text from a chat completion"""
+        self._last_ok_ts = time.monotonic()
+        if response.choices and len(response.choices) > 0:
+            return response.choices[0].message.content.strip()
+        logger.error("No response choices received from OpenAI")
+        return None
+    
+    def _log_api_error(self, error: Exception):
+        """Log an error raised by a chat completion request"""
+        # Make the next connection test hit the API again
+        self._last_ok_ts = 0.0
+        if isinstance(error, openai.RateLimitError):
+            logger.error(f"OpenAI rate limit exceeded: {error}")
+        elif isinstance(error, openai.AuthenticationError):
+            logger.error(f"OpenAI authentication error: {error}")
+        elif isinstance(error, openai.APIError):
+            logger.error(f"OpenAI API error: {error}")
+        else:
+            logger.error(f"Unexpected error calling OpenAI API: {error}")
+    
+    def _complete(self, system_prompt: str, prompt: str, max_tokens: Optional[int] = None) -> Optional[str]:
+        """Send a chat completion request and return the response text"""
         try:
             logger.info("Sending request to OpenAI API...")
-            
-            response = openai.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert SQL query generator. You convert natural language questions into valid SQLite queries. Always respond with ONLY the SQL query, no explanations or markdown formatting."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                top_p=1,
-                frequency_penalty=0,
-                presence_penalty=0
+            response = self.client.chat.completions.create(
+                **self._completion_request(system_prompt, prompt, max_tokens)
             )
-            
-            if response.choices and len(response.choices) > 0:
-                sql_query = response.choices[0].message.content.strip()
-                logger.info(f"Generated SQL: {sql_query}")
-                return sql_query
-            else:
-                logger.error("No response choices received from OpenAI")
-                return None
-                
-        except openai.RateLimitError as e:
-            logger.error(f"OpenAI rate limit exceeded: {e}")
+            return self._response_content(response)
+        except Exception as e:
+            self._log_api_error(e)
             return None
-        except openai.AuthenticationError as e:
-            logger.error(f"OpenAI authentication error: {e}")
+    
+    def _stream_sql(self, prompt: str) -> Optional[str]:
+        """Stream a SQL completion, returning as soon as the query is complete"""
+        try:
+            logger.info("Sending streaming request to OpenAI API...")
+            stream = self.client.chat.completions.create(
+                **self._completion_request(SQL_SYSTEM_PROMPT, prompt),
+                stream=True
+            )
+            collector = SQLStreamCollector()
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if collector.feed(chunk.choices[0].delta.content):
+                            break
+            finally:
+                # Stops generation early if we broke out before the end
+                stream.close()
+            return self._streamed_content(collector)
+        except Exception as e:
+            self._log_api_error(e)
             return None
-        except openai.APIError as e:
-            logger.error(f"OpenAI API error: {e}")
+    
+    async def _astream_sql(self, prompt: str) -> Optional[str]:
+        """Async variant of _stream_sql"""
+        try:
+            logger.info("Sending async streaming request to OpenAI API...")
+            stream = await self.async_client.chat.completions.create(
+                **self._completion_request(SQL_SYSTEM_PROMPT, prompt),
+                stream=True
+            )
+            collector = SQLStreamCollector()
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if collector.feed(chunk.choices[0].delta.content):
+                            break
+            finally:
+                await stream.close()
+            return self._streamed_content(collector)
+        except Exception as e:
+            self._log_api_error(e)
             return None
+    
+    def _streamed_content(self, collector: SQLStreamCollector) -> Optional[str]:
+        """Extract the response text from a streamed completion"""
+        self._last_ok_ts = time.monotonic()
+        if collector.content:
+            return collector.content
+        logger.error("No content received from OpenAI stream")
+        return None
+    
+    async def _acomplete(self, system_prompt: str, prompt: str, max_tokens: Optional[int] = None) -> Optional[str]:
+        """Async variant of _complete"""
+        try:
+            logger.info("Sending async request to OpenAI API...")
+            response = await self.async_client.chat.completions.create(
+                **self._completion_request(system_prompt, prompt, max_tokens)
+            )
+            return self._response_content(response)
         except Exception as e:
-            logger.error(f"Unexpected error calling OpenAI API: {e}")
+            self._log_api_error(e)
             return None
     
     def test_connection(self) -> bool:
         """
         Test the OpenAI API connection
         
+        A success is trusted for CONNECTION_OK_TTL seconds, so callers can
+        check before every question without a billable round trip each time.
+        A failure is reported for CONNECTION_FAIL_TTL seconds, so a burst of
+        questions during an outage doesn't wait on one probe each.
+        
         Returns:
             bool: True if connection successful, False otherwise
         """
+        now = time.monotonic()
+        if now - self._last_ok_ts < self.CONNECTION_OK_TTL:
+            return True
+        if now - self._last_fail_ts < self.CONNECTION_FAIL_TTL:
+            return False
+        
         try:
-            response = openai.chat.completions.create(
+            response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
@@ -97,7 +316,9 @@ class OpenAIService:
                 max_tokens=10,
                 temperature=0
             )
+            self._last_ok_ts = time.monotonic()
             return True
         except Exception as e:
             logger.error(f"OpenAI connection test failed: {e}")
+            self._last_fail_ts = time.monotonic()
             return False
\ No newline at end of file
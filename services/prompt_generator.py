@@ -1,13 +1,26 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 class PromptGenerator:
     """Generates prompts for the text-to-SQL model"""
     
     def __init__(self, database_context: Dict[str, Any]):
         self.db_context = database_context
+        self._schema_prompt: Optional[str] = None
+        self._question_prefix: Optional[str] = None
     
     def create_schema_prompt(self) -> str:
-        """Create a detailed schema description for the prompt"""
+        """
+        Create a detailed schema description for the prompt.
+        
+        The context is fixed for the lifetime of a generator, so the
+        description is built once and reused for every question.
+        """
+        if self._schema_prompt is None:
+            self._schema_prompt = self._build_schema_prompt()
+        return self._schema_prompt
+    
+    def _build_schema_prompt(self) -> str:
+        """Render the schema description from the database context"""
         prompt_parts = []
         prompt_parts.append("Database Schema Information:")
         prompt_parts.append("=" * 50)
@@ -47,18 +60,30 @@ class PromptGenerator:
                     prompt_parts.append(f"  - {fk['column']} -> {fk['referenced_table']}.{fk['referenced_column']}")
             
             # Sample data
-            if schema.sample_data:
+            if schema.sample_rows:
                 prompt_parts.append("Sample Data:")
-                for i, row in enumerate(schema.sample_data, 1):
-                    prompt_parts.append(f"  Row {i}: {dict(row)}")
+                for i, row in enumerate(schema.sample_rows_json, 1):
+                    prompt_parts.append(f"  Row {i}: {row}")
         
         return "\n".join(prompt_parts)
     
     def create_text_to_sql_prompt(self, user_question: str) -> str:
-        """Create complete prompt for text-to-SQL generation"""
+        """
+        Create complete prompt for text-to-SQL generation.
+        
+        Everything before the question is rendered once per generator, so
+        each question costs a concatenation and every prompt shares an
+        identical prefix (which OpenAI's prompt cache can reuse).
+        """
+        if self._question_prefix is None:
+            self._question_prefix = self._build_question_prefix()
+        return f"{self._question_prefix}{user_question}\n\n        SQL Query:"
+    
+    def _build_question_prefix(self) -> str:
+        """Render the single-question prompt up to the question itself"""
         schema_info = self.create_schema_prompt()
         
-        prompt = f"""You are an expert SQL query generator. Convert the natural language question into a valid SQLite query.
+        return f"""You are an expert SQL query generator. Convert the natural language question into a valid SQLite query.
 
         {schema_info}
 
@@ -74,8 +99,34 @@ class PromptGenerator:
         9. Use table and column descriptions to understand business context
         10. Be case-insensitive in your matching
 
-        Question: {user_question}
+        Question: """
+    
+    def create_batch_text_to_sql_prompt(self, user_questions: List[str]) -> str:
+        """Create a single prompt asking for one SQL query per question"""
+        schema_info = self.create_schema_prompt()
+        numbered_questions = "\n".join(
+            f"{i}. {question}" for i, question in enumerate(user_questions, 1)
+        )
+        
+        prompt = f"""You are an expert SQL query generator. Convert each natural language question into a valid SQLite query.
+
+        {schema_info}
+
+        Rules:
+        1. Return ONLY a JSON array of {len(user_questions)} SQL query strings, one per numbered question, in order
+        2. Use proper SQLite syntax
+        3. Always include appropriate WHERE clauses when filtering
+        4. Use JOINs when accessing multiple tables
+        5. Include LIMIT clause for potentially large results (max 100 rows)
+        6. Handle NULL values appropriately
+        7. Use aggregate functions (COUNT, SUM, AVG, etc.) when appropriate
+        8. Ensure the query will not fail - use proper error handling
+        9. Use table and column descriptions to understand business context
+        10. Be case-insensitive in your matching
+
+        Questions:
+{numbered_questions}
 
-        SQL Query:"""
+        JSON Array:"""
         
-        return prompt
\ No newline at end of file
+        return prompt
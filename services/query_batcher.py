@@ -0,0 +1,134 @@
+# services/query_batcher.py
+"""
+Micro-batching executor that coalesces concurrent questions into shared OpenAI calls
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BatchingTextToSQLExecutor:
+    """
+    Collects questions submitted within a short window and hands them to the
+    text-to-SQL service as one batch, so a burst of requests costs a single
+    OpenAI call instead of one call per request.
+    
+    Batches run as coroutines on a dedicated event loop, so in-flight OpenAI
+    calls don't each hold a thread while waiting on the network.
+    
+    With execute_queries=False results carry validated SQL only, so callers
+    can execute and stream rows on their own thread.
+    """
+    
+    def __init__(self, service, max_batch_size: int = 8, max_wait_ms: int = 50,
+                 max_concurrent_batches: int = 4, execute_queries: bool = True):
+        self.service = service
+        self.execute_queries = execute_queries
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrent_batches = max_concurrent_batches
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._run_loop,
+            name='sql-batch-loop',
+            daemon=True
+        )
+        self._loop_thread.start()
+        # Bounds how many batch prompts are in flight at once
+        self._batch_slots = asyncio.run_coroutine_threadsafe(
+            self._create_semaphore(), self._loop
+        ).result()
+        
+        self._collector = threading.Thread(
+            target=self._collect_batches,
+            name='sql-batch-collector',
+            daemon=True
+        )
+        self._collector.start()
+    
+    def submit(self, question: str) -> Future:
+        """Queue a question and return a future resolving to its result dict"""
+        future = Future()
+        self._queue.put((question, future))
+        return future
+    
+    def shutdown(self):
+        """Stop collecting new batches, wait for in-flight ones and close the service's clients"""
+        self._queue.put(None)
+        self._collector.join()
+        asyncio.run_coroutine_threadsafe(self._drain_and_close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+    
+    async def _drain_and_close(self):
+        """Finish in-flight batches, then close the service's HTTP clients on this loop"""
+        pending = asyncio.all_tasks() - {asyncio.current_task()}
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if hasattr(self.service, 'aclose'):
+            await self.service.aclose()
+    
+    def _run_loop(self):
+        """Run the event loop that hosts batch coroutines"""
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+        pending = asyncio.all_tasks(self._loop)
+        if pending:
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self._loop.close()
+    
+    async def _create_semaphore(self) -> asyncio.Semaphore:
+        """Create the batch semaphore on the executor's event loop"""
+        return asyncio.Semaphore(self.max_concurrent_batches)
+    
+    def _collect_batches(self):
+        """Group queued questions into batches and dispatch them"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._dispatch(batch)
+                    return
+                batch.append(item)
+            
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch: List[Tuple[str, Future]]):
+        """Schedule a batch on the event loop"""
+        asyncio.run_coroutine_threadsafe(self._run_batch(batch), self._loop)
+    
+    async def _run_batch(self, batch: List[Tuple[str, Future]]):
+        """Process a batch and resolve each waiting future with its own result"""
+        questions = [question for question, _ in batch]
+        
+        async with self._batch_slots:
+            logger.info(f"Dispatching batch of {len(questions)} questions")
+            try:
+                results = await self.service.aprocess_questions(questions, self.execute_queries)
+            except Exception as e:
+                logger.error(f"Error processing question batch: {e}", exc_info=True)
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+        
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -3,90 +3,226 @@
 # ============================================================================
 import re
 import sqlite3
-from typing import Tuple, Optional, Any, Dict
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import islice
+from typing import NamedTuple, Tuple, Optional, Any, Dict, Iterator, List
 from models.database import DatabaseManager
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Comment patterns stripped before the safety check, compiled once
+_LINE_COMMENT_RE = re.compile(r'--.*$', re.MULTILINE)
+_BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+# Write/DDL keywords as whole words, so identifiers like CREATED_AT pass
+_DANGEROUS_RE = re.compile(
+    r'\b(?:INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|TRUNCATE|REPLACE|ATTACH|DETACH|PRAGMA)\b'
+)
+_LIMIT_RE = re.compile(r'\bLIMIT\b')
+_EXPLAIN_RE = re.compile(r'\s*EXPLAIN\b', re.IGNORECASE)
+# Result values passed to JSON as is; anything else is converted with str()
+_PRIMITIVE_TYPES = frozenset((int, float, str, bool, type(None)))
+
+class QueryTraits(NamedTuple):
+    """What the validator needs to know about a query's text"""
+    safe: bool
+    is_select: bool
+    has_limit: bool
+
+@lru_cache(maxsize=512)
+def _classify_query(query: str) -> QueryTraits:
+    """Classify a query from a single normalization pass; cached by query text"""
+    # Remove comments and normalize whitespace
+    clean_query = _LINE_COMMENT_RE.sub('', query)
+    clean_query = _BLOCK_COMMENT_RE.sub('', clean_query)
+    clean_query = clean_query.strip().upper()
+    
+    # Allow only SELECT, WITH (for CTEs), and EXPLAIN
+    safe = (_DANGEROUS_RE.search(clean_query) is None
+            and clean_query.startswith(('SELECT', 'WITH', 'EXPLAIN')))
+    return QueryTraits(
+        safe=safe,
+        is_select=clean_query.startswith('SELECT'),
+        has_limit=_LIMIT_RE.search(clean_query) is not None
+    )
+
 class QueryValidator:
     """Validates and sanitizes SQL queries"""
     
+    # Recent validate_syntax outcomes kept per SQL string
+    VALIDATION_CACHE_SIZE = 256
+    
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
+        self._validate_cache: "OrderedDict[str, Tuple[bool, Optional[str]]]" = OrderedDict()
+        self._validate_lock = threading.Lock()
     
     def is_safe_query(self, query: str) -> bool:
         """Check if query is safe (read-only operations)"""
-        # Remove comments and normalize whitespace
-        clean_query = re.sub(r'--.*$', '', query, flags=re.MULTILINE)
-        clean_query = re.sub(r'/\*.*?\*/', '', clean_query, flags=re.DOTALL)
-        clean_query = clean_query.strip().upper()
-        
-        # Allow only SELECT, WITH (for CTEs), and EXPLAIN
-        dangerous_keywords = [
-            'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER', 
-            'TRUNCATE', 'REPLACE', 'ATTACH', 'DETACH', 'PRAGMA'
-        ]
-        
-        for keyword in dangerous_keywords:
-            if keyword in clean_query:
-                return False
-        
-        return clean_query.startswith(('SELECT', 'WITH', 'EXPLAIN'))
+        return self._classify(query).safe
+    
+    def _classify(self, query: str) -> QueryTraits:
+        """Safety, statement kind and LIMIT presence of a query"""
+        return _classify_query(query)
     
     def validate_syntax(self, query: str) -> Tuple[bool, Optional[str]]:
-        """Validate SQL syntax without executing"""
+        """
+        Validate SQL syntax without executing.
+        
+        Preparing EXPLAIN QUERY PLAN parses and plans the statement once
+        without running it; success means the query can be executed as is.
+        Outcomes are cached per query until clear_validation_cache() is
+        called, which callers must do when the schema changes.
+        """
+        with self._validate_lock:
+            cached = self._validate_cache.get(query)
+            if cached is not None:
+                self._validate_cache.move_to_end(query)
+                return cached
+        
+        # An EXPLAIN statement is itself only planned, never run
+        plan_query = query if _EXPLAIN_RE.match(query) else f"EXPLAIN QUERY PLAN {query}"
         try:
-            cursor = self.db_manager.connection.cursor()
-            cursor.execute(f"EXPLAIN QUERY PLAN {query}")
-            return True, None
+            self.db_manager.connection.execute(plan_query)
+            outcome = (True, None)
         except sqlite3.Error as e:
-            return False, str(e)
+            outcome = (False, str(e))
+        
+        with self._validate_lock:
+            self._validate_cache[query] = outcome
+            while len(self._validate_cache) > self.VALIDATION_CACHE_SIZE:
+                self._validate_cache.popitem(last=False)
+        return outcome
     
-    def execute_safe_query(self, query: str, limit: int = 100) -> Tuple[bool, Any]:
-        """Execute query safely with error handling"""
+    def clear_validation_cache(self):
+        """Forget cached validate_syntax outcomes (call after schema changes)"""
+        with self._validate_lock:
+            self._validate_cache.clear()
+    
+    def prepare_safe_query(self, query: str, limit: int = 100) -> Tuple[bool, str]:
+        """Check a query is safe and push a row limit into it"""
+        traits = self._classify(query)
+        if not traits.safe:
+            return False, "Query contains unsafe operations"
+        
+        # Add LIMIT if not present and it's a SELECT
+        if traits.is_select and not traits.has_limit:
+            return True, f"{query.rstrip(';')} LIMIT {limit}"
+        
+        return True, query
+    
+    def stream_safe_query(self, query: str, limit: int = 100) -> Tuple[bool, Any]:
+        """
+        Execute query safely and return its rows lazily.
+        
+        On success the result is a dict with 'columns', the executed 'query'
+        and a 'rows' iterator of JSON-safe row dicts fetched in chunks, so
+        large results are never fully materialized. The cursor belongs to
+        the calling thread's connection and must be consumed on that thread.
+        """
         try:
-            if not self.is_safe_query(query):
-                return False, "Query contains unsafe operations"
-            
-            # Add LIMIT if not present and it's a SELECT
-            if 'LIMIT' not in query.upper() and query.strip().upper().startswith('SELECT'):
-                query = f"{query.rstrip(';')} LIMIT {limit}"
+            is_safe, query = self.prepare_safe_query(query, limit)
+            if not is_safe:
+                return False, query
             
             logger.info(f"Executing query: {query}")
             
-            cursor = self.db_manager.connection.cursor()
-            cursor.execute(query)
+            cursor = self.db_manager.connection.execute(query)
             
             # Get column names
             columns = [description[0] for description in cursor.description] if cursor.description else []
-            rows = cursor.fetchall()
             
-            # Convert rows to list of dictionaries for JSON serialization
-            data = []
-            for row in rows:
-                row_dict = {}
-                for i, column in enumerate(columns):
-                    # Handle different data types properly
-                    value = row[i]
-                    if value is None:
-                        row_dict[column] = None
-                    elif isinstance(value, (int, float, str)):
-                        row_dict[column] = value
-                    else:
-                        # Convert other types to string
-                        row_dict[column] = str(value)
-                data.append(row_dict)
+            # Always stop fetching at the cap: WITH/EXPLAIN queries get no
+            # LIMIT pushed in, and a LIMIT seen in the text may belong to a
+            # subquery or string literal rather than the outer query
+            rows = islice(self._iter_rows(cursor, columns), limit)
             
-            result = {
+            return True, {
                 'columns': columns,
-                'data': data,
-                'row_count': len(data),
+                'rows': rows,
                 'query': query
             }
             
-            logger.info(f"Query executed successfully, returned {len(data)} rows")
-            return True, result
+        except sqlite3.Error as e:
+            logger.error(f"SQL Error: {e}")
+            return False, f"SQL Error: {str(e)}"
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            return False, f"Unexpected error: {str(e)}"
+    
+    def _iter_rows(self, cursor: sqlite3.Cursor, columns: List[str], chunk_size: int = 256) -> Iterator[Dict[str, Any]]:
+        """Yield rows as JSON-serializable dicts, fetching them in chunks"""
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                row_dict = dict(zip(columns, row))
+                if not _PRIMITIVE_TYPES.issuperset(map(type, row)):
+                    # Convert other types to string
+                    for column, value in row_dict.items():
+                        if type(value) not in _PRIMITIVE_TYPES:
+                            row_dict[column] = str(value)
+                yield row_dict
+    
+    def execute_safe_query(self, query: str, limit: int = 100, columnar: bool = False) -> Tuple[bool, Any]:
+        """
+        Execute query safely with error handling.
+        
+        With columnar=True the result is column-oriented: 'data' holds one
+        list of values per entry of 'columns' and 'layout' is 'columnar'.
+        Otherwise 'data' is a list of row dicts.
+        """
+        if columnar:
+            return self._execute_columnar(query, limit)
+        
+        success, result = self.stream_safe_query(query, limit)
+        if not success:
+            return False, result
+        
+        try:
+            data = list(result['rows'])
+        except sqlite3.Error as e:
+            logger.error(f"SQL Error: {e}")
+            return False, f"SQL Error: {str(e)}"
+        
+        logger.info(f"Query executed successfully, returned {len(data)} rows")
+        return True, {
+            'columns': result['columns'],
+            'data': data,
+            'row_count': len(data),
+            'query': result['query']
+        }
+    
+    def _execute_columnar(self, query: str, limit: int) -> Tuple[bool, Any]:
+        """Execute query safely and return a column-oriented result"""
+        try:
+            is_safe, query = self.prepare_safe_query(query, limit)
+            if not is_safe:
+                return False, query
+            
+            logger.info(f"Executing query: {query}")
+            # WITH/EXPLAIN queries get no LIMIT pushed in; stop fetching at the cap instead
+            columns, data = self.db_manager.execute_query_columnar(query, limit=limit)
+            for i, values in enumerate(data):
+                if not _PRIMITIVE_TYPES.issuperset(map(type, values)):
+                    # Convert other types to string
+                    data[i] = [
+                        value if type(value) in _PRIMITIVE_TYPES else str(value)
+                        for value in values
+                    ]
+            
+            row_count = len(data[0]) if data else 0
+            logger.info(f"Query executed successfully, returned {row_count} rows")
+            return True, {
+                'columns': columns,
+                'data': data,
+                'row_count': row_count,
+                'query': query,
+                'layout': 'columnar'
+            }
             
         except sqlite3.Error as e:
             logger.error(f"SQL Error: {e}")
@@ -94,4 +230,3 @@ class QueryValidator:
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
             return False, f"Unexpected error: {str(e)}"
-
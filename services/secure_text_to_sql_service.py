@@ -1,70 +1,228 @@
 """
 Secure text-to-SQL service using mock sample data for PCI/MNPI compliance
 """
+import asyncio
+import hashlib
 import re
-from typing import Dict, Any
+from functools import cached_property, lru_cache
+from typing import Dict, Any, List, Optional, Pattern, Tuple
+from config import Config
 from models.database import DatabaseManager
 from models.secure_schema_inspector import SecureSchemaInspector
 from services.query_validator import QueryValidator
 from services.prompt_generator import PromptGenerator
-from services.openai_service import OpenAIService
+from services.sql_cache import SQLCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Patterns used on every generated query, compiled once
+_FENCE_RE = re.compile(r'```(?:sql)?\s*', re.IGNORECASE)
+_SAMPLE_REF_RE = re.compile(r'\b(\w+)_sample\b', re.IGNORECASE)
+# Code fences and _sample references together, for one cleaning pass
+_CLEAN_RE = re.compile(_FENCE_RE.pattern + '|' + _SAMPLE_REF_RE.pattern, re.IGNORECASE)
+_LEADING_TEXT_RE = re.compile(r'^.*?(?=SELECT|WITH|EXPLAIN)', re.IGNORECASE | re.DOTALL)
+# Line that opens the SQL statement, matched without upper-casing the line
+_SQL_START_RE = re.compile(r'(?:SELECT|WITH|EXPLAIN)\b', re.IGNORECASE)
+_WS_RE = re.compile(r'\s+')
+# Content of a non-blank line, without surrounding whitespace
+_LINE_RE = re.compile(r'^[^\S\n]*(\S.*?)[^\S\n]*$', re.MULTILINE)
+_NO_SUCH_TABLE_RE = re.compile(r'no such table', re.IGNORECASE)
+_NO_SUCH_COLUMN_RE = re.compile(r'no such column: (\w+)', re.IGNORECASE)
+
+def _clean_replacement(match: re.Match) -> str:
+    """_CLEAN_RE replacement: drop fences, keep the real table name of a _sample reference"""
+    return match.group(1) or ''
+
+@lru_cache(maxsize=512)
+def _clean_and_secure_sql(generated_sql: str) -> str:
+    """Clean generated SQL and strip sample table references; cached by input text"""
+    
+    # Basic cleaning
+    sql = generated_sql.strip()
+    
+    # Remove markdown code blocks and, for security, any _sample references
+    # the AI might have included, in one scan. Plain substring probes skip
+    # the regex when the model returned bare SQL on the real tables
+    if '```' in sql or '_sample' in sql.lower():
+        sql = _CLEAN_RE.sub(_clean_replacement, sql)
+    
+    # Remove explanatory text that AI might add
+    sql_lines = []
+    in_sql = False
+    
+    # Non-blank lines, already stripped, without splitting the text first
+    for line_match in _LINE_RE.finditer(sql):
+        line = line_match.group(1)
+        if _SQL_START_RE.match(line):
+            in_sql = True
+            sql_lines.append(line)
+        elif in_sql and line and not line.startswith(('--', 'Note:', 'Explanation:', 'Here', 'This')):
+            sql_lines.append(line)
+        elif in_sql and line.endswith(';'):
+            sql_lines.append(line)
+            break
+    
+    if sql_lines:
+        sql = ' '.join(sql_lines)
+    
+    # Remove any remaining explanatory text; kept lines already start at
+    # the line opening the statement
+    if not sql_lines:
+        sql = _LEADING_TEXT_RE.sub('', sql)
+    
+    # Ensure single line formatting
+    sql = _WS_RE.sub(' ', sql).strip()
+    
+    # Add semicolon if missing
+    if not sql.endswith(';'):
+        sql += ';'
+    
+    return sql
+
 class SecureTextToSQLService:
     """Secure text-to-SQL service that uses mock sample data for AI context"""
     
+    # Shorter questions are rejected before any cache lookup or OpenAI call
+    MIN_QUESTION_LENGTH = 3
+    
+    # attempt_query_fix rules: error message pattern -> fixer method; the
+    # first pattern found in the error message picks the fix
+    _FIX_RULES = (
+        (_NO_SUCH_TABLE_RE, '_fix_table_names'),
+        (_NO_SUCH_COLUMN_RE, '_fix_column_names'),
+    )
+    
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
         self.schema_inspector = SecureSchemaInspector(db_manager)
         self.validator = QueryValidator(db_manager)
-        self.openai_service = OpenAIService()
-        self.db_context = None
-        self.prompt_generator = None
-        self._initialize_context()
+        self.sql_cache = SQLCache(
+            maxsize=Config.SQL_CACHE_MAX_SIZE,
+            ttl=Config.SQL_CACHE_TTL_SECONDS
+        )
+        # Prompt generator (and its rendered schema prompt) per schema version
+        self._prompt_cache: Dict[int, PromptGenerator] = {}
+        # The OpenAI client and the database context are built on first use,
+        # so startup neither imports the OpenAI SDK nor walks the schema
     
-    def _initialize_context(self):
-        """Initialize database context with secure schema inspector"""
+    @cached_property
+    def openai_service(self) -> 'OpenAIService':
+        """OpenAI client, created on first use"""
+        from services.openai_service import OpenAIService
+        return OpenAIService()
+    
+    @cached_property
+    def db_context(self) -> Dict[str, Any]:
+        """Database context from the secure schema inspector, loaded on first use"""
         try:
-            self.db_context = self.schema_inspector.get_database_context()
-            self.prompt_generator = PromptGenerator(self.db_context)
+            db_context = self.schema_inspector.get_database_context()
             
             # Log security status
-            missing_mock_tables = self.db_context.get('missing_mock_tables', [])
+            missing_mock_tables = db_context.get('missing_mock_tables', [])
             if missing_mock_tables:
                 logger.warning(f"Security Alert: Some tables missing mock data: {missing_mock_tables}")
                 logger.warning("Consider creating mock tables for complete PCI/MNPI compliance")
             else:
                 logger.info("Security: All tables have corresponding mock sample data")
                 
-            logger.info(f"Initialized secure context with {len(self.db_context['tables'])} tables")
+            logger.info(f"Initialized secure context with {len(db_context['tables'])} tables")
+            return db_context
             
         except Exception as e:
             logger.error(f"Failed to initialize secure context: {e}")
             raise
     
-    def process_question(self, user_question: str) -> Dict[str, Any]:
-        """Process question using secure mock sample data"""
+    @property
+    def prompt_generator(self) -> PromptGenerator:
+        """Prompt generator for the current schema version"""
+        version = self.schema_inspector.get_schema_version()
+        generator = self._prompt_cache.get(version)
+        if generator is None:
+            if self._prompt_cache:
+                logger.info("Schema changed, reloading secure database context")
+                self._initialize_context()
+            generator = PromptGenerator(self.db_context)
+            self._prompt_cache = {version: generator}
+        return generator
+    
+    @cached_property
+    def _static_database_info(self) -> Dict[str, Any]:
+        """Database info fields derived from the (cached) context"""
+        missing_mock_tables = self.db_context.get('missing_mock_tables', [])
+        tables = self.db_context['tables']
+        
+        return {
+            'total_tables': len(tables),
+            'tables': tables,
+            'security_mode': 'mock_samples',
+            'missing_mock_tables': missing_mock_tables,
+            'compliance_status': 'PCI/MNPI Compliant' if not missing_mock_tables else 'Partial Compliance',
+            'data_protection': 'Real data protected - using mock sample data for AI context',
+            'sample_tables_found': len(tables) - len(missing_mock_tables),
+            'schemas_loaded': len(self.db_context['schemas'])
+        }
+    
+    @cached_property
+    def _table_name_matcher(self) -> Tuple[Pattern, Dict[str, str]]:
+        """One case-insensitive pattern matching any table name, plus lowercase -> real name"""
+        canonical = {table.lower(): table for table in self.db_context['tables']}
+        # Longest names first so a table is never matched by its prefix
+        names = sorted(canonical, key=len, reverse=True)
+        pattern = re.compile(
+            r'\b(?:' + '|'.join(map(re.escape, names)) + r')\b' if names else r'(?!)',
+            re.IGNORECASE
+        )
+        return pattern, canonical
+    
+    @cached_property
+    def _column_name_matcher(self) -> Tuple[Pattern, Dict[str, str]]:
+        """One case-insensitive pattern matching any column name, plus lowercase -> real name"""
+        canonical = {}
+        for schema in self.db_context['schemas'].values():
+            for column in schema.columns:
+                canonical.setdefault(column['name'].lower(), column['name'])
+        names = sorted(canonical, key=len, reverse=True)
+        pattern = re.compile(
+            r'\b(?:' + '|'.join(map(re.escape, names)) + r')\b' if names else r'(?!)',
+            re.IGNORECASE
+        )
+        return pattern, canonical
+    
+    def _initialize_context(self):
+        """(Re)load database context with secure schema inspector"""
+        self.__dict__.pop('db_context', None)
+        self.__dict__.pop('_static_database_info', None)
+        self.__dict__.pop('_table_name_matcher', None)
+        self.__dict__.pop('_column_name_matcher', None)
+        self.validator.clear_validation_cache()
+        self._prompt_cache = {}
+        return self.db_context
+    
+    def process_question(self, user_question: str, execute: bool = True) -> Dict[str, Any]:
+        """
+        Process question using secure mock sample data.
+        
+        With execute=False the validated SQL is returned without a 'result',
+        leaving execution to the caller (e.g. to stream rows).
+        """
         try:
             logger.info(f"Processing question securely: {user_question}")
             
-            # Validate input
-            if not user_question or not user_question.strip():
-                return {
-                    'success': False,
-                    'error': 'Empty question provided',
-                    'question': user_question
-                }
+            question_error = self._validate_question(user_question)
+            if question_error:
+                return question_error
             
-            # Test OpenAI connection first
-            if not self.test_openai_connection():
-                return {
-                    'success': False,
-                    'error': 'OpenAI API is not accessible. Please check your API key and internet connection.',
-                    'question': user_question,
-                    'suggestion': 'Verify your OPENAI_API_KEY in the .env file'
-                }
+            # Repeat questions against an unchanged schema skip OpenAI entirely
+            cache_key = self._sql_cache_key(user_question)
+            cached_sql = self.sql_cache.get(cache_key)
+            if cached_sql is not None:
+                logger.info("Using cached SQL for question")
+                return self._process_generated_sql(user_question, cached_sql, execute)
+            
+            openai_error = self._check_openai_available(user_question)
+            if openai_error:
+                return openai_error
             
             # Generate prompt using mock sample data
             prompt = self.create_secure_prompt(user_question)
@@ -73,13 +231,210 @@ class SecureTextToSQLService:
             # Generate SQL using OpenAI
             generated_sql = self.openai_service.generate_sql(prompt)
             if generated_sql is None:
-                return {
-                    'success': False,
-                    'error': 'Failed to generate SQL from OpenAI. API may be temporarily unavailable.',
-                    'question': user_question,
-                    'suggestion': 'Try rephrasing your question or check OpenAI service status'
-                }
+                return self._generation_failed(user_question)
+            
+            result = self._process_generated_sql(user_question, generated_sql, execute)
+            self._remember_sql(cache_key, generated_sql, result)
+            return result
+                
+        except Exception as e:
+            return self._processing_error(user_question, e)
+    
+    async def aprocess_question(self, user_question: str, execute: bool = True) -> Dict[str, Any]:
+        """
+        Async variant of process_question.
+        
+        The OpenAI call is awaited on the event loop; blocking SQLite work
+        runs in a worker thread so the loop is never stalled.
+        """
+        try:
+            logger.info(f"Processing question securely: {user_question}")
+            
+            question_error = self._validate_question(user_question)
+            if question_error:
+                return question_error
+            
+            cache_key = await asyncio.to_thread(self._sql_cache_key, user_question)
+            cached_sql = self.sql_cache.get(cache_key)
+            if cached_sql is not None:
+                logger.info("Using cached SQL for question")
+                return await asyncio.to_thread(self._process_generated_sql, user_question, cached_sql, execute)
+            
+            openai_error = await asyncio.to_thread(self._check_openai_available, user_question)
+            if openai_error:
+                return openai_error
+            
+            # Checks the schema version, and may reload the context, on SQLite
+            prompt = await asyncio.to_thread(self.create_secure_prompt, user_question)
+            generated_sql = await self.openai_service.agenerate_sql(prompt)
+            if generated_sql is None:
+                return self._generation_failed(user_question)
+            
+            result = await asyncio.to_thread(self._process_generated_sql, user_question, generated_sql, execute)
+            self._remember_sql(cache_key, generated_sql, result)
+            return result
+                
+        except Exception as e:
+            return self._processing_error(user_question, e)
+    
+    def process_questions(self, user_questions: List[str], execute: bool = True) -> List[Dict[str, Any]]:
+        """Process several questions securely with a single OpenAI call"""
+        if len(user_questions) == 1:
+            return [self.process_question(user_questions[0], execute)]
+        
+        try:
+            logger.info(f"Processing {len(user_questions)} questions securely in one batch")
+            
+            results, pending = self._resolve_cached_questions(user_questions, execute)
+            if len(pending) <= 1 or not self.test_openai_connection():
+                for i, _ in pending:
+                    results[i] = self.process_question(user_questions[i], execute)
+                return results
+            
+            prompt = self.create_secure_batch_prompt([user_questions[i] for i, _ in pending])
+            generated_queries = self.openai_service.generate_sql_batch(prompt, len(pending))
+            if generated_queries is None:
+                logger.warning("Batched SQL generation failed, falling back to one call per question")
+                for i, _ in pending:
+                    results[i] = self.process_question(user_questions[i], execute)
+                return results
+            
+            for (i, cache_key), generated_sql in zip(pending, generated_queries):
+                results[i] = self._process_generated_sql(user_questions[i], generated_sql, execute)
+                self._remember_sql(cache_key, generated_sql, results[i])
+            return results
+            
+        except Exception as e:
+            return [self._processing_error(question, e) for question in user_questions]
+    
+    async def aprocess_questions(self, user_questions: List[str], execute: bool = True) -> List[Dict[str, Any]]:
+        """Async variant of process_questions"""
+        if len(user_questions) == 1:
+            return [await self.aprocess_question(user_questions[0], execute)]
+        
+        try:
+            logger.info(f"Processing {len(user_questions)} questions securely in one batch")
+            
+            results, pending = await asyncio.to_thread(self._resolve_cached_questions, user_questions, execute)
+            if len(pending) <= 1 or not await asyncio.to_thread(self.test_openai_connection):
+                fallback = await asyncio.gather(*(self.aprocess_question(user_questions[i], execute) for i, _ in pending))
+                for (i, _), result in zip(pending, fallback):
+                    results[i] = result
+                return results
+            
+            prompt = await asyncio.to_thread(
+                self.create_secure_batch_prompt, [user_questions[i] for i, _ in pending]
+            )
+            generated_queries = await self.openai_service.agenerate_sql_batch(prompt, len(pending))
+            if generated_queries is None:
+                logger.warning("Batched SQL generation failed, falling back to one call per question")
+                fallback = await asyncio.gather(*(self.aprocess_question(user_questions[i], execute) for i, _ in pending))
+                for (i, _), result in zip(pending, fallback):
+                    results[i] = result
+                return results
+            
+            def process_generated():
+                for (i, cache_key), generated_sql in zip(pending, generated_queries):
+                    results[i] = self._process_generated_sql(user_questions[i], generated_sql, execute)
+                    self._remember_sql(cache_key, generated_sql, results[i])
+            
+            await asyncio.to_thread(process_generated)
+            return results
+            
+        except Exception as e:
+            return [self._processing_error(question, e) for question in user_questions]
+    
+    def _resolve_cached_questions(self, user_questions: List[str], execute: bool = True) -> Tuple[List[Optional[Dict[str, Any]]], List[Tuple[int, Any]]]:
+        """
+        Answer the questions that are invalid or have cached SQL.
+        
+        Returns the partially filled results list and the (index, cache key)
+        pairs of the questions that still need SQL generated.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(user_questions)
+        pending = []
+        
+        for i, question in enumerate(user_questions):
+            question_error = self._validate_question(question)
+            if question_error:
+                results[i] = question_error
+                continue
             
+            cache_key = self._sql_cache_key(question)
+            cached_sql = self.sql_cache.get(cache_key)
+            if cached_sql is not None:
+                results[i] = self._process_generated_sql(question, cached_sql, execute)
+            else:
+                pending.append((i, cache_key))
+        
+        return results, pending
+    
+    def _sql_cache_key(self, user_question: str) -> Tuple[str, int]:
+        """Cache key for a question: normalized question hash plus schema version"""
+        normalized = ' '.join(user_question.lower().split())
+        question_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        return question_hash, self.schema_inspector.get_schema_version()
+    
+    def _remember_sql(self, cache_key: Tuple[str, int], generated_sql: str, result: Dict[str, Any]):
+        """
+        Cache generated SQL once it has been processed successfully.
+        
+        With execute=False (the batcher path) success only means the SQL
+        passed validation; the caller runs it afterwards.
+        """
+        if result.get('success'):
+            self.sql_cache.set(cache_key, generated_sql)
+    
+    def _validate_question(self, user_question: str) -> Optional[Dict[str, Any]]:
+        """Return an error response if the question is empty or too short to answer"""
+        question = user_question.strip() if user_question else ''
+        if not question:
+            return {
+                'success': False,
+                'error': 'Empty question provided',
+                'question': user_question
+            }
+        if len(question) < self.MIN_QUESTION_LENGTH:
+            return {
+                'success': False,
+                'error': 'Question is too short',
+                'question': user_question
+            }
+        return None
+    
+    def _check_openai_available(self, user_question: str) -> Optional[Dict[str, Any]]:
+        """Return an error response if OpenAI can't be reached"""
+        if not self.test_openai_connection():
+            return {
+                'success': False,
+                'error': 'OpenAI API is not accessible. Please check your API key and internet connection.',
+                'question': user_question,
+                'suggestion': 'Verify your OPENAI_API_KEY in the .env file'
+            }
+        return None
+    
+    def _generation_failed(self, user_question: str) -> Dict[str, Any]:
+        """Error response for when OpenAI returned no SQL"""
+        return {
+            'success': False,
+            'error': 'Failed to generate SQL from OpenAI. API may be temporarily unavailable.',
+            'question': user_question,
+            'suggestion': 'Try rephrasing your question or check OpenAI service status'
+        }
+    
+    def _processing_error(self, user_question: str, error: Exception) -> Dict[str, Any]:
+        """Error response for an unexpected failure while processing a question"""
+        logger.error(f"Error processing question securely: {error}", exc_info=error)
+        return {
+            'success': False,
+            'error': f"Processing error: {str(error)}",
+            'question': user_question,
+            'suggestion': 'Please try again or contact support if the issue persists.'
+        }
+    
+    def _process_generated_sql(self, user_question: str, generated_sql: str, execute: bool = True) -> Dict[str, Any]:
+        """Clean, validate and (optionally) execute SQL generated for a question"""
+        try:
             logger.info(f"OpenAI generated SQL: {generated_sql[:100]}...")
             
             # Clean and secure the generated SQL
@@ -90,9 +445,11 @@ class SecureTextToSQLService:
             is_valid, error_msg = self.validator.validate_syntax(sql_query)
             if not is_valid:
                 logger.warning(f"SQL validation failed: {error_msg}")
-                # Try to fix common issues
-                sql_query = self.attempt_query_fix(sql_query, error_msg)
-                is_valid, error_msg = self.validator.validate_syntax(sql_query)
+                # Try to fix common issues; only re-plan if the fix changed something
+                fixed_query = self.attempt_query_fix(sql_query, error_msg)
+                if fixed_query != sql_query:
+                    sql_query = fixed_query
+                    is_valid, error_msg = self.validator.validate_syntax(sql_query)
                 
                 if is_valid:
                     logger.info("Successfully fixed SQL query")
@@ -108,24 +465,28 @@ class SecureTextToSQLService:
                     'suggestion': 'Try rephrasing your question or being more specific about table names.'
                 }
             
+            response = {
+                'success': True,
+                'query': sql_query,
+                'question': user_question,
+                'security_info': {
+                    'mode': 'secure_mock_samples',
+                    'real_data_protected': True,
+                    'sample_data_source': 'mock_tables',
+                    'compliance': 'PCI/MNPI'
+                }
+            }
+            if not execute:
+                return response
+            
             # Execute query on REAL tables (not sample tables)
             logger.info("Executing validated SQL query on real tables")
             success, result = self.validator.execute_safe_query(sql_query)
             
             if success:
                 logger.info(f"Query executed successfully, returned {result['row_count']} rows")
-                return {
-                    'success': True,
-                    'query': sql_query,
-                    'result': result,
-                    'question': user_question,
-                    'security_info': {
-                        'mode': 'secure_mock_samples',
-                        'real_data_protected': True,
-                        'sample_data_source': 'mock_tables',
-                        'compliance': 'PCI/MNPI'
-                    }
-                }
+                response['result'] = result
+                return response
             else:
                 logger.error(f"Query execution failed: {result}")
                 return {
@@ -137,10 +498,11 @@ class SecureTextToSQLService:
                 }
                 
         except Exception as e:
-            logger.error(f"Error processing question securely: {e}", exc_info=True)
+            logger.error(f"Error processing generated SQL securely: {e}", exc_info=True)
             return {
                 'success': False,
                 'error': f"Processing error: {str(e)}",
+                'query': generated_sql,
                 'question': user_question,
                 'suggestion': 'Please try again or contact support if the issue persists.'
             }
@@ -168,85 +530,63 @@ SQL Query:"""
         
         return secure_prompt
     
-    def clean_and_secure_sql(self, generated_sql: str) -> str:
-        """Clean generated SQL and ensure no sample table references"""
-        
-        # Basic cleaning
-        sql = generated_sql.strip()
-        
-        # Remove markdown code blocks
-        sql = re.sub(r'```sql\s*', '', sql, flags=re.IGNORECASE)
-        sql = re.sub(r'```\s*', '', sql)
-        
-        # Remove explanatory text that AI might add
-        lines = sql.split('\n')
-        sql_lines = []
-        in_sql = False
-        
-        for line in lines:
-            line = line.strip()
-            if line.upper().startswith(('SELECT', 'WITH', 'EXPLAIN')):
-                in_sql = True
-                sql_lines.append(line)
-            elif in_sql and line and not line.startswith(('--', 'Note:', 'Explanation:', 'Here', 'This')):
-                sql_lines.append(line)
-            elif in_sql and line.endswith(';'):
-                sql_lines.append(line)
-                break
-        
-        sql = ' '.join(sql_lines) if sql_lines else sql
-        
-        # Security: Remove any _sample references the AI might have included
-        sql = re.sub(r'\b(\w+)_sample\b', r'\1', sql, flags=re.IGNORECASE)
-        
-        # Remove any remaining explanatory text
-        sql = re.sub(r'^.*?(?=SELECT|WITH|EXPLAIN)', '', sql, flags=re.IGNORECASE | re.DOTALL)
+    def create_secure_batch_prompt(self, user_questions: List[str]) -> str:
+        """Create a secure prompt for several questions using mock sample data"""
         
-        # Ensure single line formatting
-        sql = ' '.join(sql.split())
+        base_prompt = self.prompt_generator.create_batch_text_to_sql_prompt(user_questions)
         
-        # Add semicolon if missing
-        if not sql.rstrip().endswith(';'):
-            sql = sql.rstrip() + ';'
+        secure_prompt = f"""{base_prompt}
+
+IMPORTANT SECURITY NOTES:
+- The sample data shown above is mock/test data for context only
+- Generate queries against the actual table names (without _sample suffix)
+- Do not reference any _sample tables in your SQL output
+- Focus on the table structure and data patterns, not the actual sample values
+
+Remember: Query the real tables, not the sample tables!
+
+JSON Array:"""
         
-        return sql.strip()
+        return secure_prompt
+    
+    def clean_and_secure_sql(self, generated_sql: str) -> str:
+        """Clean generated SQL and ensure no sample table references"""
+        return _clean_and_secure_sql(generated_sql)
     
     def attempt_query_fix(self, sql_query: str, error_msg: str) -> str:
         """Attempt to fix common SQL errors"""
         
         fixed_query = sql_query
         
-        # Fix table name case issues
-        if "no such table" in error_msg.lower():
-            for table_name in self.db_context['tables']:
-                # Replace case-insensitive table name references
-                pattern = rf'\b{re.escape(table_name)}\b'
-                fixed_query = re.sub(pattern, table_name, fixed_query, flags=re.IGNORECASE)
-        
-        # Fix column name issues
-        if "no such column" in error_msg.lower():
-            # Extract column name from error message
-            column_match = re.search(r'no such column: (\w+)', error_msg, re.IGNORECASE)
-            if column_match:
-                error_column = column_match.group(1)
-                # Try to find similar column names
-                for table_name, schema in self.db_context['schemas'].items():
-                    for column in schema.columns:
-                        if column['name'].lower() == error_column.lower():
-                            fixed_query = re.sub(
-                                rf'\b{re.escape(error_column)}\b',
-                                column['name'],
-                                fixed_query,
-                                flags=re.IGNORECASE
-                            )
-                            break
+        # Apply the fixer of the first rule matching the error message
+        for error_re, fixer in self._FIX_RULES:
+            error_match = error_re.search(error_msg)
+            if error_match:
+                fixed_query = getattr(self, fixer)(fixed_query, error_match)
+                break
         
         # Remove any remaining _sample references
-        fixed_query = re.sub(r'\b(\w+)_sample\b', r'\1', fixed_query, flags=re.IGNORECASE)
+        if '_sample' in fixed_query.lower():
+            fixed_query = _SAMPLE_REF_RE.sub(r'\1', fixed_query)
         
         logger.info(f"Attempted to fix SQL: {sql_query} -> {fixed_query}")
         return fixed_query
     
+    def _fix_table_names(self, sql_query: str, error_match: re.Match) -> str:
+        """Fix table name case issues"""
+        # Replace case-insensitive table name references in one scan
+        pattern, canonical = self._table_name_matcher
+        return pattern.sub(lambda m: canonical[m.group(0).lower()], sql_query)
+    
+    def _fix_column_names(self, sql_query: str, error_match: re.Match) -> str:
+        """Fix column name case issues for the column named in the error"""
+        pattern, canonical = self._column_name_matcher
+        # A column missing from every table can't be fixed by re-casing
+        if error_match.group(1).lower() not in canonical:
+            return sql_query
+        # Replace case-insensitive column name references in one scan
+        return pattern.sub(lambda m: canonical[m.group(0).lower()], sql_query)
+    
     def test_openai_connection(self) -> bool:
         """Test OpenAI API connection"""
         try:
@@ -255,22 +595,19 @@ SQL Query:"""
             logger.error(f"OpenAI connection test failed: {e}")
             return False
     
+    async def aclose(self):
+        """Close the OpenAI client's HTTP connections, if the client was created"""
+        openai_service = self.__dict__.get('openai_service')
+        if openai_service is not None:
+            await openai_service.aclose()
+    
     def get_database_info(self) -> Dict[str, Any]:
         """Get database information with security status"""
         
         try:
-            missing_mock_tables = self.db_context.get('missing_mock_tables', [])
-            
             return {
-                'total_tables': len(self.db_context['tables']),
-                'tables': self.db_context['tables'],
-                'security_mode': 'mock_samples',
-                'missing_mock_tables': missing_mock_tables,
-                'compliance_status': 'PCI/MNPI Compliant' if not missing_mock_tables else 'Partial Compliance',
-                'openai_status': self.test_openai_connection(),
-                'data_protection': 'Real data protected - using mock sample data for AI context',
-                'sample_tables_found': len(self.db_context['tables']) - len(missing_mock_tables),
-                'schemas_loaded': len(self.db_context['schemas'])
+                **self._static_database_info,
+                'openai_status': self.test_openai_connection()
             }
         except Exception as e:
             logger.error(f"Error getting database info: {e}")
@@ -377,6 +714,8 @@ SQL Query:"""
         """Refresh database context (call after schema changes)"""
         try:
             logger.info("Refreshing secure database context...")
+            self.sql_cache.clear()
+            self.schema_inspector.invalidate()
             self._initialize_context()
             logger.info("Context refreshed successfully")
         except Exception as e:
@@ -415,7 +754,8 @@ SQL Query:"""
                 'total_tables': compliance['total_tables'],
                 'missing_mock_tables': len(compliance.get('missing_mock_tables', [])),
                 'service_version': '1.0.0',
-                'security_mode': 'mock_samples'
+                'security_mode': 'mock_samples',
+                'sql_cache': self.sql_cache.stats()
             }
             
             # Determine overall health
@@ -1,25 +1,113 @@
 
+import heapq
 import re
+from collections import defaultdict
 from typing import Dict, List, Any, Optional
 from models.database import DatabaseManager
 from models.schema_inspector import SchemaInspector
+from services.sql_cache import SQLCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+_WORD_RE = re.compile(r'\w+')
+
 class SmartSchemaService:
     """Intelligent schema management for large databases"""
     
+    # Relevance weights per kind of schema token a question word can hit
+    TABLE_NAME_WEIGHT = 100
+    TABLE_PART_WEIGHT = 50
+    COLUMN_NAME_WEIGHT = 30
+    COLUMN_PART_WEIGHT = 15
+    TABLE_DESCRIPTION_WEIGHT = 10
+    COLUMN_DESCRIPTION_WEIGHT = 5
+    
+    # Table selections remembered per (question words, max_tables)
+    RELEVANT_TABLES_CACHE_SIZE = 1024
+    RELEVANT_TABLES_CACHE_TTL = 3600
+    
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
         self.schema_inspector = SchemaInspector(db_manager)
-        self.full_context = None
+        # Inverted index over the schema: token -> ids of the features it matches.
+        # A feature (a table name, one column's name parts, ...) scores once
+        # per question no matter how many of its tokens the question contains.
+        self._token_index: Dict[str, List[int]] = {}
+        self._feature_tables: List[str] = []
+        self._feature_weights: List[int] = []
+        self._table_positions: Dict[str, int] = {}
+        self._indexed_context: Optional[Dict[str, Any]] = None
+        self._relevant_tables_cache = SQLCache(
+            maxsize=self.RELEVANT_TABLES_CACHE_SIZE,
+            ttl=self.RELEVANT_TABLES_CACHE_TTL
+        )
         self._initialize_context()
     
+    @property
+    def full_context(self) -> Dict[str, Any]:
+        """Full database context; the inspector reloads it only when the schema changes"""
+        return self.schema_inspector.get_database_context()
+    
     def _initialize_context(self):
         """Initialize and cache full database context"""
-        self.full_context = self.schema_inspector.get_database_context()
-        logger.info(f"Loaded schema for {len(self.full_context['tables'])} tables")
+        context = self._indexed_full_context()
+        logger.info(f"Loaded schema for {len(context['tables'])} tables")
+    
+    def _indexed_full_context(self) -> Dict[str, Any]:
+        """Full context, rebuilding the token index if the context was reloaded"""
+        context = self.full_context
+        if context is not self._indexed_context:
+            self._build_token_index(context)
+            self._relevant_tables_cache.clear()
+            self._indexed_context = context
+        return context
+    
+    def refresh_context(self):
+        """Reload the schema context and drop cached table selections"""
+        self.schema_inspector.invalidate()
+        self._indexed_context = None
+        self._initialize_context()
+    
+    def _build_token_index(self, context: Dict[str, Any]):
+        """Index every table/column name, name part and description word"""
+        token_index = defaultdict(list)
+        feature_tables = []
+        feature_weights = []
+        
+        def add_feature(table_name: str, weight: int, tokens):
+            feature_id = len(feature_tables)
+            feature_tables.append(table_name)
+            feature_weights.append(weight)
+            for token in set(tokens):
+                if token:
+                    token_index[token].append(feature_id)
+        
+        for table_name in context['tables']:
+            table_lower = table_name.lower()
+            schema = context['schemas'][table_name]
+            
+            add_feature(table_name, self.TABLE_NAME_WEIGHT, [table_lower])
+            add_feature(table_name, self.TABLE_PART_WEIGHT, table_lower.split('_'))
+            
+            for column in schema.columns:
+                col_name = column['name'].lower()
+                add_feature(table_name, self.COLUMN_NAME_WEIGHT, [col_name])
+                add_feature(table_name, self.COLUMN_PART_WEIGHT, col_name.split('_'))
+            
+            # Each shared description word counts separately
+            if schema.description:
+                for word in set(_WORD_RE.findall(schema.description.lower())):
+                    add_feature(table_name, self.TABLE_DESCRIPTION_WEIGHT, [word])
+            
+            for col_desc in context['column_descriptions'].get(table_name, []):
+                add_feature(table_name, self.COLUMN_DESCRIPTION_WEIGHT,
+                            _WORD_RE.findall(col_desc.description.lower()))
+        
+        self._token_index = dict(token_index)
+        self._feature_tables = feature_tables
+        self._feature_weights = feature_weights
+        self._table_positions = {table: i for i, table in enumerate(context['tables'])}
     
     def get_relevant_tables(self, user_question: str, max_tables: int = 10) -> List[str]:
         """
@@ -32,59 +120,39 @@ class SmartSchemaService:
         Returns:
             List of relevant table names
         """
-        question_lower = user_question.lower()
-        all_tables = self.full_context['tables']
+        all_tables = self._indexed_full_context()['tables']
         
-        # Score tables based on relevance
-        table_scores = {}
+        # Only the question's distinct words affect the ranking
+        tokens = frozenset(_WORD_RE.findall(user_question.lower()))
+        cache_key = (tokens, max_tables)
+        cached = self._relevant_tables_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
         
-        for table_name in all_tables:
-            score = 0
-            table_lower = table_name.lower()
-            schema = self.full_context['schemas'][table_name]
-            
-            # Direct table name mention
-            if table_lower in question_lower:
-                score += 100
-            
-            # Partial table name match
-            if any(part in question_lower for part in table_lower.split('_')):
-                score += 50
-            
-            # Column name mentions
-            for column in schema.columns:
-                col_name = column['name'].lower()
-                if col_name in question_lower:
-                    score += 30
-                
-                # Partial column name match
-                if any(part in question_lower for part in col_name.split('_')):
-                    score += 15
-            
-            # Table description keywords
-            if schema.description:
-                desc_words = schema.description.lower().split()
-                question_words = question_lower.split()
-                common_words = set(desc_words) & set(question_words)
-                score += len(common_words) * 10
-            
-            # Column descriptions
-            column_descs = self.full_context['column_descriptions'].get(table_name, [])
-            for col_desc in column_descs:
-                if any(word in col_desc.description.lower() for word in question_lower.split()):
-                    score += 5
-            
-            table_scores[table_name] = score
+        # Collect the schema features the question's words hit
+        matched = set()
+        for token in tokens:
+            matched.update(self._token_index.get(token, ()))
+        
+        # Score tables based on relevance
+        table_scores = defaultdict(int)
+        for feature_id in matched:
+            table_scores[self._feature_tables[feature_id]] += self._feature_weights[feature_id]
         
-        # Sort by score and return top tables
-        sorted_tables = sorted(table_scores.items(), key=lambda x: x[1], reverse=True)
-        relevant_tables = [table for table, score in sorted_tables[:max_tables] if score > 0]
+        # Highest scores first; ties keep schema order
+        positions = self._table_positions
+        relevant_tables = [
+            table for table, score in heapq.nlargest(
+                max_tables, table_scores.items(), key=lambda kv: (kv[1], -positions[kv[0]])
+            )
+        ]
         
         # If no relevant tables found, include some core tables
         if not relevant_tables:
             relevant_tables = all_tables[:max_tables]
         
         logger.info(f"Selected {len(relevant_tables)} relevant tables: {relevant_tables}")
+        self._relevant_tables_cache.set(cache_key, tuple(relevant_tables))
         return relevant_tables
     
     def get_contextual_schema(self, user_question: str, max_tables: int = 10) -> Dict[str, Any]:
@@ -99,15 +167,17 @@ class SmartSchemaService:
             Filtered database context
         """
         relevant_tables = self.get_relevant_tables(user_question, max_tables)
+        # Read the context once; each full_context access re-checks the schema version
+        full_context = self._indexed_full_context()
         
         filtered_context = {
             'tables': relevant_tables,
-            'schemas': {table: self.full_context['schemas'][table] for table in relevant_tables},
+            'schemas': {table: full_context['schemas'][table] for table in relevant_tables},
             'column_descriptions': {
-                table: self.full_context['column_descriptions'].get(table, []) 
+                table: full_context['column_descriptions'].get(table, []) 
                 for table in relevant_tables
             },
-            'total_tables': len(self.full_context['tables']),
+            'total_tables': len(full_context['tables']),
             'showing_tables': len(relevant_tables)
         }
         
@@ -2,7 +2,7 @@
 # services/text_to_sql_service.py (Updated with better error handling)
 # ============================================================================
 import re
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from models.database import DatabaseManager
 from models.schema_inspector import SchemaInspector
 from services.query_validator import QueryValidator
@@ -12,9 +12,75 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Patterns used on every generated query, compiled once
+_FENCE_RE = re.compile(r'```(?:sql)?\s*')
+# The statement: from the first line opening with a SQL keyword up to a
+# semicolon ending a line (so one inside a string literal is kept), a
+# closing fence, or a line of explanation
+_SQL_BLOCK_RE = re.compile(
+    r'^[ \t]*((?i:SELECT|WITH|EXPLAIN)\b.*?(?:;(?=[ \t]*(?:\n|\Z))|(?=```|\n\s*(?:Note:|Explanation:|Here|This)|\Z)))',
+    re.MULTILINE | re.DOTALL
+)
+# Line breaks inside the statement, swallowing whole-line -- comments
+_LINE_BREAK_RE = re.compile(r'\s*\n(?:[ \t]*--[^\n]*\n?)*\s*')
+_LEADING_TEXT_RE = re.compile(r'^.*?(?=SELECT|WITH|EXPLAIN)', re.IGNORECASE | re.DOTALL)
+# One SELECT/WITH statement of bounded size, at most a trailing semicolon
+_FAST_VALIDATE_RE = re.compile(r'\s*(?:SELECT|WITH)\b[^;]{0,4000};?\s*$', re.IGNORECASE)
+# Errors raised while preparing a statement, which validation and
+# attempt_query_fix may resolve; anything else failed while running it
+_PREPARE_ERROR_RE = re.compile(
+    r'no such (?:table|column)|syntax error|incomplete input|unrecognized token|ambiguous column name',
+    re.IGNORECASE
+)
+
+def make_query_fixer(table_names: List[str]) -> Callable[[str, str], str]:
+    """
+    Build attempt_query_fix for one set of table names.
+    
+    The pattern and the lowercase -> real name map are built here once and
+    captured by the returned function, so a fix reads only local cells.
+    """
+    # One case-insensitive pattern for every table name, longest first so
+    # a table is never matched by its prefix, plus lowercase -> real name
+    table_canon = {table.lower(): table for table in table_names}
+    names = sorted(table_canon, key=len, reverse=True)
+    table_name_re = re.compile(
+        r'\b(?:' + '|'.join(map(re.escape, names)) + r')\b' if names else r'(?!)',
+        re.IGNORECASE
+    )
+    
+    def canonical_name(match: re.Match) -> str:
+        return table_canon[match.group(0).lower()]
+    
+    def attempt_query_fix(sql_query: str, error_msg: str) -> str:
+        """Attempt to fix common SQL errors"""
+        fixed_query = sql_query
+        
+        # Fix table/column name issues
+        if "no such table" in error_msg.lower():
+            # Replace case-insensitive table name references in one scan
+            fixed_query = table_name_re.sub(canonical_name, fixed_query)
+        
+        # Add missing semicolon
+        fixed_query = fixed_query.rstrip()
+        if not fixed_query.endswith(';'):
+            fixed_query += ';'
+        
+        return fixed_query
+    
+    return attempt_query_fix
+
 class TextToSQLService:
     """Main service class for text-to-SQL conversion using OpenAI"""
     
+    # Shorter questions are rejected before any OpenAI call
+    MIN_QUESTION_LENGTH = 3
+    
+    # Loaded contexts shared by every service on the same database file:
+    # db path -> (schema_version, db_context, prompt_generator,
+    #             attempt_query_fix, debug_info_static)
+    _ctx_cache: Dict[str, Tuple[int, Dict[str, Any], PromptGenerator, Callable[[str, str], str], Dict[str, Any]]] = {}
+    
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
         self.schema_inspector = SchemaInspector(db_manager)
@@ -22,14 +88,59 @@ class TextToSQLService:
         self.openai_service = OpenAIService()
         self.db_context = None
         self.prompt_generator = None
+        # Schema version of the context this service is using
+        self._schema_version = None
         self._initialize_context()
     
-    def _initialize_context(self):
-        """Initialize database context and prompt generator"""
+    def _initialize_context(self, force: bool = False):
+        """
+        Initialize database context and prompt generator.
+        
+        The schema is only reflected again when PRAGMA schema_version has
+        moved since the cached context was built (or when forced).
+        """
+        version = self.schema_inspector.get_schema_version()
+        if force or version != self._schema_version:
+            # Cached validation outcomes ("no such table", valid) belong to the old schema
+            self.validator.clear_validation_cache()
+            self._schema_version = version
+        
+        cached = self._ctx_cache.get(self.db_manager.db_path)
+        if not force and cached is not None and cached[0] == version:
+            (_, self.db_context, self.prompt_generator,
+             self.attempt_query_fix, self._debug_info_static) = cached
+            return
+        
         self.db_context = self.schema_inspector.get_database_context()
         self.prompt_generator = PromptGenerator(self.db_context)
+        tables = self.db_context['tables']
+        
+        # attempt_query_fix(sql_query, error_msg), specialized to these tables
+        self.attempt_query_fix = make_query_fixer(tables)
+        
+        # get_database_info fields that only change with the schema. Sample
+        # counts are only reported for samples already read (None otherwise),
+        # so building this doesn't run every table's sample query
+        self._debug_info_static = {
+            'total_tables': len(tables),
+            'tables': tables,
+            'schemas': {
+                name: {
+                    'columns': len(schema.columns),
+                    'sample_rows': len(schema.sample_rows) if schema.samples_loaded else None,
+                    'foreign_keys': len(schema.foreign_keys),
+                    'description': schema.description
+                }
+                for name, schema in self.db_context['schemas'].items()
+            }
+        }
+        
+        self._ctx_cache[self.db_manager.db_path] = (
+            version, self.db_context, self.prompt_generator,
+            self.attempt_query_fix, self._debug_info_static
+        )
     
-    def generate_sql_response(self, prompt: str) -> str:
+    def generate_sql_response(self, prompt: str) -> Optional[str]:
         """
         Generate SQL response using OpenAI API
         
@@ -37,14 +148,12 @@ class TextToSQLService:
             prompt (str): The text-to-SQL prompt with schema information
             
         Returns:
-            str: Generated SQL query
+            Optional[str]: Generated SQL query, or None if OpenAI could not be reached
         """
         sql_query = self.openai_service.generate_sql(prompt)
         
         if sql_query is None:
-            # Fallback to a simple query if OpenAI fails
-            logger.warning("OpenAI API failed, using fallback query")
-            return "SELECT 'OpenAI API unavailable. Please check your API key and try again.' as error_message;"
+            logger.warning("OpenAI API failed, no SQL generated")
         
         return sql_query
     
@@ -53,46 +162,68 @@ class TextToSQLService:
         try:
             logger.info(f"Processing question: {user_question}")
             
-            # Test OpenAI connection first
-            if not self.test_openai_connection():
+            question = user_question.strip() if user_question else ''
+            if len(question) < self.MIN_QUESTION_LENGTH:
                 return {
                     'success': False,
-                    'error': 'OpenAI API is not accessible. Please check your API key and internet connection.',
+                    'error': 'Question is too short' if question else 'Empty question provided',
                     'question': user_question
                 }
             
+            # Pick up schema changes; a single PRAGMA when nothing changed
+            self._initialize_context()
+            
             # Generate prompt
             prompt = self.prompt_generator.create_text_to_sql_prompt(user_question)
             logger.info("Generated prompt for OpenAI")
             
-            # Generate SQL query using OpenAI
+            # Generate SQL query using OpenAI; a failed call is the availability check
             generated_sql = self.generate_sql_response(prompt)
+            if generated_sql is None:
+                return {
+                    'success': False,
+                    'error': 'OpenAI API is not accessible. Please check your API key and internet connection.',
+                    'question': user_question
+                }
             logger.info(f"OpenAI generated SQL: {generated_sql}")
             
             # Clean up the generated SQL
             sql_query = self.clean_generated_sql(generated_sql)
             logger.info(f"Cleaned SQL: {sql_query}")
             
-            # Validate the query
-            is_valid, error_msg = self.validator.validate_syntax(sql_query)
-            if not is_valid:
-                logger.warning(f"SQL validation failed: {error_msg}")
-                # Try to fix common issues
-                sql_query = self.attempt_query_fix(sql_query, error_msg)
-                is_valid, error_msg = self.validator.validate_syntax(sql_query)
-            
-            if not is_valid:
-                return {
-                    'success': False,
-                    'error': f"Invalid SQL generated: {error_msg}",
-                    'query': sql_query,
-                    'question': user_question,
-                    'suggestion': 'Try rephrasing your question or being more specific.'
-                }
+            # A single read-only SELECT/WITH statement is executed straight
+            # away: executing prepares it anyway, so a separate validation
+            # pass is only paid for when it could not be prepared. Errors
+            # while running it are returned as they are
+            result = None
+            if _FAST_VALIDATE_RE.match(sql_query) and self.validator.is_safe_query(sql_query):
+                logger.info("Executing SQL query")
+                success, result = self.validator.execute_safe_query(sql_query)
+                if not success and _PREPARE_ERROR_RE.search(result):
+                    logger.warning(f"Direct execution failed, validating: {result}")
+                    result = None
             
-            # Execute the query
-            logger.info("Executing validated SQL query")
-            success, result = self.validator.execute_safe_query(sql_query)
+            if result is None:
+                # Validate the query
+                is_valid, error_msg = self.validator.validate_syntax(sql_query)
+                if not is_valid:
+                    logger.warning(f"SQL validation failed: {error_msg}")
+                    # Try to fix common issues
+                    sql_query = self.attempt_query_fix(sql_query, error_msg)
+                    is_valid, error_msg = self.validator.validate_syntax(sql_query)
+                
+                if not is_valid:
+                    return {
+                        'success': False,
+                        'error': f"Invalid SQL generated: {error_msg}",
+                        'query': sql_query,
+                        'question': user_question,
+                        'suggestion': 'Try rephrasing your question or being more specific.'
+                    }
+                
+                # Execute the query
+                logger.info("Executing validated SQL query")
+                success, result = self.validator.execute_safe_query(sql_query)
             
             if success:
                 logger.info(f"Query executed successfully, returned {result['row_count']} rows")
@@ -127,73 +258,30 @@ class TextToSQLService:
     
     def clean_generated_sql(self, generated_sql: str) -> str:
         """Clean and normalize generated SQL"""
-        sql = generated_sql.strip()
-        
-        # Remove markdown code blocks
-        sql = re.sub(r'```sql\s*', '', sql)
-        sql = re.sub(r'```\s*', '', sql)
-        
-        # Remove explanatory text before/after SQL
-        lines = sql.split('\n')
-        sql_lines = []
-        in_sql = False
-        
-        for line in lines:
-            line = line.strip()
-            if line.upper().startswith(('SELECT', 'WITH', 'EXPLAIN')):
-                in_sql = True
-                sql_lines.append(line)
-            elif in_sql and line and not line.startswith(('--', 'Note:', 'Explanation:', 'Here', 'This')):
-                sql_lines.append(line)
-            elif in_sql and line.endswith(';'):
-                sql_lines.append(line)
-                break
-        
-        result = ' '.join(sql_lines) if sql_lines else sql
+        match = _SQL_BLOCK_RE.search(generated_sql)
+        if match:
+            # Join the statement's lines, as it is logged and shown on one line
+            return _LINE_BREAK_RE.sub(' ', match.group(1)).strip()
         
-        # Remove any remaining explanatory text
-        result = re.sub(r'^.*?(?=SELECT|WITH|EXPLAIN)', '', result, flags=re.IGNORECASE | re.DOTALL)
-        
-        return result.strip()
-    
-    def attempt_query_fix(self, sql_query: str, error_msg: str) -> str:
-        """Attempt to fix common SQL errors"""
-        fixed_query = sql_query
-        
-        # Fix table/column name issues
-        if "no such table" in error_msg.lower():
-            for table_name in self.db_context['tables']:
-                if table_name.lower() in sql_query.lower():
-                    fixed_query = re.sub(
-                        rf'\b{re.escape(table_name)}\b', 
-                        table_name, 
-                        fixed_query, 
-                        flags=re.IGNORECASE
-                    )
-        
-        # Add missing semicolon
-        if not fixed_query.rstrip().endswith(';'):
-            fixed_query = fixed_query.rstrip() + ';'
-        
-        return fixed_query
+        # No line starts a statement: drop fences and any text before one
+        sql = _FENCE_RE.sub('', generated_sql.strip())
+        return _LEADING_TEXT_RE.sub('', sql).strip()
     
     def get_database_info(self) -> Dict[str, Any]:
         """Get database information for debugging"""
         return {
-            'total_tables': len(self.db_context['tables']),
-            'tables': self.db_context['tables'],
-            'schemas': {
-                name: {
-                    'columns': len(schema.columns),
-                    'sample_rows': len(schema.sample_data),
-                    'foreign_keys': len(schema.foreign_keys),
-                    'description': schema.description
-                }
-                for name, schema in self.db_context['schemas'].items()
-            },
+            **self._debug_info_static,
             'openai_status': self.test_openai_connection()
         }
     
-    def refresh_context(self):
-        """Refresh database context (call after schema changes)"""
-        self._initialize_context()
+    def refresh_context(self, force: bool = True):
+        """
+        Refresh database context (call after schema changes)
+        
+        With force=False the cached context is kept unless the schema
+        version changed; force=True also reloads metadata and samples,
+        which don't bump the schema version.
+        """
+        if force:
+            self.schema_inspector.invalidate()
+        self._initialize_context(force=force)
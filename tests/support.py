@@ -0,0 +1,29 @@
+"""
+Shared fixtures: a sample database built by setup_database in a temp dir
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from models.database import DatabaseManager
+from setup_database import create_sample_database
+
+class SampleDatabaseTestCase(unittest.TestCase):
+    """Builds the sample database once per test class and a fresh manager per test"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls._tmpdir.name, 'test.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_sample_database(cls.db_path)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmpdir.cleanup()
+    
+    def setUp(self):
+        self.db_manager = DatabaseManager(self.db_path)
+        self.addCleanup(self.db_manager.close)
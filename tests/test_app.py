@@ -0,0 +1,167 @@
+import concurrent.futures
+import logging
+import queue
+import unittest
+from unittest import mock
+
+import orjson
+
+import app as app_module
+from config import Config
+from services.secure_text_to_sql_service import SecureTextToSQLService
+from tests.support import SampleDatabaseTestCase
+
+def failing_counter_query(failing_row):
+    """Counts to 1000, raising integer overflow when it reaches failing_row"""
+    return (
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000) "
+        f"SELECT CASE WHEN i = {failing_row} THEN abs(-9223372036854775807 - 1) ELSE i END AS i FROM n;"
+    )
+
+class FakeExecutor:
+    """Resolves each question to a canned SQL query; never, with hang=True or for questions in stuck"""
+    
+    def __init__(self, queries, hang=False):
+        self.queries = queries
+        self.hang = hang
+        self.stuck = set()
+    
+    def submit(self, question):
+        future = concurrent.futures.Future()
+        if not self.hang and question not in self.stuck:
+            future.set_result({
+                'success': True,
+                'question': question,
+                'query': self.queries[question]
+            })
+        return future
+
+class AppTestCase(SampleDatabaseTestCase):
+    """Runs the Flask app against the sample database with a fake batcher"""
+    
+    def setUp(self):
+        super().setUp()
+        self.service = SecureTextToSQLService(self.db_manager)
+        self.executor = FakeExecutor({
+            'list users': 'SELECT user_id, username FROM users ORDER BY user_id;',
+            'count users': 'SELECT COUNT(*) AS n FROM users;',
+            # Overflows on the given row, after the statement has started
+            'fail early': failing_counter_query(3),
+            'fail late': failing_counter_query(300),
+        })
+        for name, value in (('db_manager', self.db_manager),
+                            ('text_to_sql_service', self.service),
+                            ('query_executor', self.executor)):
+            patcher = mock.patch.object(app_module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(app_module.app.extensions, {'services_ready': True})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = app_module.app.test_client()
+    
+    def post(self, path, body):
+        response = self.client.post(path, json=body)
+        return response, orjson.loads(response.get_data())
+
+class ProcessQueryTest(AppTestCase):
+    
+    def test_returns_rows_for_generated_query(self):
+        response, body = self.post('/api/query', {'question': 'list users'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(body['success'])
+        self.assertEqual(body['result']['columns'], ['user_id', 'username'])
+        self.assertEqual(body['result']['row_count'], len(body['result']['data']))
+        self.assertEqual(body['result']['data'][0]['user_id'], 1)
+    
+    def test_error_on_the_first_rows_is_a_json_error_response(self):
+        response, body = self.post('/api/query', {'question': 'fail early'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(body['success'])
+        self.assertIn('integer overflow', body['error'])
+        self.assertNotIn('result', body)
+    
+    def test_error_mid_stream_closes_the_document_with_an_error(self):
+        with mock.patch.dict(app_module.app.config, {'MAX_QUERY_RESULTS': 1000}):
+            response, body = self.post('/api/query', {'question': 'fail late'})
+        
+        self.assertIn('integer overflow', body['error'])
+        self.assertEqual(body['result']['row_count'], len(body['result']['data']))
+        self.assertEqual(body['result']['data'][-1], {'i': body['result']['row_count']})
+        self.assertLess(body['result']['row_count'], 300)
+    
+    def test_times_out_with_504_when_the_batch_never_resolves(self):
+        self.executor.hang = True
+        with mock.patch.object(Config, 'QUERY_TIMEOUT_SECONDS', 0.05):
+            response, body = self.post('/api/query', {'question': 'list users'})
+        
+        self.assertEqual(response.status_code, 504)
+        self.assertFalse(body['success'])
+        self.assertIn('timed out', body['error'])
+
+class ProcessQueriesTest(AppTestCase):
+    
+    def test_each_result_has_the_api_query_row_layout(self):
+        # Large enough that the old threshold switched to a columnar result
+        with mock.patch.dict(app_module.app.config, {'MAX_QUERY_RESULTS': 5000}):
+            _, single = self.post('/api/query', {'question': 'list users'})
+            response, body = self.post('/api/queries', {'questions': ['list users', 'count users']})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(body['success'])
+        self.assertEqual([result['question'] for result in body['results']], ['list users', 'count users'])
+        self.assertEqual(body['results'][0]['result'], single['result'])
+        self.assertEqual(body['results'][1]['result']['data'], [{'n': single['result']['row_count']}])
+    
+    def test_columnar_layout_on_request(self):
+        _, rows = self.post('/api/queries', {'questions': ['list users']})
+        response, body = self.post('/api/queries', {'questions': ['list users'], 'layout': 'columnar'})
+        
+        self.assertEqual(response.status_code, 200)
+        result = body['results'][0]['result']
+        self.assertEqual(result['layout'], 'columnar')
+        self.assertEqual(result['columns'], ['user_id', 'username'])
+        self.assertEqual(result['data'][0], [row['user_id'] for row in rows['results'][0]['result']['data']])
+    
+    def test_rejects_unknown_layout(self):
+        response, body = self.post('/api/queries', {'questions': ['list users'], 'layout': 'pivot'})
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('layout', body['error'])
+    
+    def test_questions_that_time_out_get_an_error_result(self):
+        self.executor.stuck.add('count users')
+        with mock.patch.object(Config, 'QUERY_TIMEOUT_SECONDS', 0.05):
+            response, body = self.post('/api/queries', {'questions': ['list users', 'count users']})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(body['success'])
+        self.assertTrue(body['results'][0]['success'])
+        self.assertFalse(body['results'][1]['success'])
+        self.assertIn('timed out', body['results'][1]['error'])
+    
+    def test_rejects_missing_empty_and_too_many_questions(self):
+        for questions in ([], ['list users', '  '], ['list users'] * (Config.MAX_QUESTIONS_PER_REQUEST + 1)):
+            response, body = self.post('/api/queries', {'questions': questions})
+            self.assertEqual(response.status_code, 400, questions)
+            self.assertFalse(body['success'])
+
+class DeferredFormatQueueHandlerTest(unittest.TestCase):
+    
+    def test_records_are_enqueued_unformatted(self):
+        log_queue = queue.SimpleQueue()
+        handler = app_module.DeferredFormatQueueHandler(log_queue)
+        args = (object(),)
+        record = logging.LogRecord('app', logging.INFO, __file__, 1, "value %s", args, None)
+        
+        handler.handle(record)
+        
+        queued = log_queue.get_nowait()
+        self.assertEqual(queued.msg, "value %s")
+        self.assertIs(queued.args, args)
+        self.assertFalse(hasattr(queued, 'message'))
+
+if __name__ == '__main__':
+    unittest.main()
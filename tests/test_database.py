@@ -0,0 +1,62 @@
+import sqlite3
+import threading
+import unittest
+
+from tests.support import SampleDatabaseTestCase
+
+class DatabaseManagerCloseTest(SampleDatabaseTestCase):
+    
+    def test_close_leaves_other_threads_connections_usable(self):
+        checked_out = threading.Event()
+        closed = threading.Event()
+        outcome = {}
+        
+        def worker():
+            conn = self.db_manager.connection
+            cursor = conn.execute("SELECT user_id FROM users ORDER BY user_id")
+            checked_out.set()
+            closed.wait()
+            # The in-flight query finishes on the original connection
+            outcome['rows'] = len(cursor.fetchall())
+            # and the next access reconnects instead of reusing it
+            outcome['reconnected'] = self.db_manager.connection is not conn
+            outcome['count'] = self.db_manager.execute_query("SELECT COUNT(*) FROM users")[0][0]
+            self.db_manager.release()
+        
+        thread = threading.Thread(target=worker)
+        thread.start()
+        checked_out.wait()
+        self.db_manager.connection
+        self.db_manager.close()
+        closed.set()
+        thread.join()
+        
+        self.assertGreater(outcome['rows'], 0)
+        self.assertTrue(outcome['reconnected'])
+        self.assertEqual(outcome['count'], outcome['rows'])
+    
+    def test_release_after_close_closes_stale_connection(self):
+        checked_out = threading.Event()
+        closed = threading.Event()
+        connections = []
+        
+        def worker():
+            connections.append(self.db_manager.connection)
+            checked_out.set()
+            closed.wait()
+            self.db_manager.release()
+        
+        thread = threading.Thread(target=worker)
+        thread.start()
+        checked_out.wait()
+        self.db_manager.close()
+        closed.set()
+        thread.join()
+        
+        self.assertNotIn(connections[0], self.db_manager._idle)
+        self.assertNotIn(connections[0], self.db_manager._connections)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            connections[0].execute("SELECT 1")
+
+if __name__ == '__main__':
+    unittest.main()
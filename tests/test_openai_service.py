@@ -0,0 +1,20 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from config import Config
+from services.openai_service import OpenAIService
+
+class OpenAIServiceCloseTest(unittest.TestCase):
+    
+    def test_aclose_closes_both_http_clients(self):
+        with mock.patch.object(Config, 'OPENAI_API_KEY', 'test-key'):
+            service = OpenAIService()
+        
+        asyncio.run(service.aclose())
+        
+        self.assertTrue(service.http_client.is_closed)
+        self.assertTrue(service.async_http_client.is_closed)
+
+if __name__ == '__main__':
+    unittest.main()
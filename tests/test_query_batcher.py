@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import unittest
+
+from services.query_batcher import BatchingTextToSQLExecutor
+
+class RecordingService:
+    """Stands in for the text-to-SQL service and records each batch it gets"""
+    
+    def __init__(self, error=None, delay=0):
+        self.batches = []
+        self.error = error
+        self.delay = delay
+        self.closed_after = None
+    
+    async def aprocess_questions(self, questions, execute_queries=True):
+        self.batches.append((list(questions), execute_queries))
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [{'success': True, 'question': question, 'query': f"SELECT '{question}';"}
+                for question in questions]
+
+    async def aclose(self):
+        self.closed_after = len(self.batches)
+
+class BatchingTextToSQLExecutorTest(unittest.TestCase):
+    
+    def make_executor(self, service, **kwargs):
+        executor = BatchingTextToSQLExecutor(service, **kwargs)
+        self.addCleanup(executor.shutdown)
+        return executor
+    
+    def test_questions_within_window_share_one_batch(self):
+        service = RecordingService()
+        executor = self.make_executor(service, max_batch_size=8, max_wait_ms=200)
+        
+        futures = [executor.submit(f"question {i}") for i in range(3)]
+        results = [future.result(timeout=5) for future in futures]
+        
+        self.assertEqual(service.batches, [(["question 0", "question 1", "question 2"], True)])
+        self.assertEqual([result['question'] for result in results],
+                         ["question 0", "question 1", "question 2"])
+    
+    def test_batches_are_capped_at_max_batch_size(self):
+        service = RecordingService()
+        executor = self.make_executor(service, max_batch_size=2, max_wait_ms=200)
+        
+        futures = [executor.submit(f"question {i}") for i in range(5)]
+        for future in futures:
+            future.result(timeout=5)
+        
+        self.assertEqual(sorted(len(questions) for questions, _ in service.batches), [1, 2, 2])
+    
+    def test_execute_queries_flag_is_passed_to_the_service(self):
+        service = RecordingService()
+        executor = self.make_executor(service, max_wait_ms=0, execute_queries=False)
+        
+        executor.submit("question").result(timeout=5)
+        
+        self.assertEqual(service.batches, [(["question"], False)])
+    
+    def test_batch_failure_is_raised_from_every_future(self):
+        service = RecordingService(error=RuntimeError("batch failed"))
+        executor = self.make_executor(service, max_wait_ms=200)
+        
+        futures = [executor.submit("first"), executor.submit("second")]
+        
+        for future in futures:
+            with self.assertRaisesRegex(RuntimeError, "batch failed"):
+                future.result(timeout=5)
+    
+    def test_concurrent_submitters_each_get_their_own_result(self):
+        service = RecordingService()
+        executor = self.make_executor(service, max_batch_size=4, max_wait_ms=50)
+        results = {}
+        
+        def ask(i):
+            results[i] = executor.submit(f"question {i}").result(timeout=5)['question']
+        
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(results, {i: f"question {i}" for i in range(10)})
+
+    def test_shutdown_finishes_in_flight_batches_then_closes_the_service(self):
+        service = RecordingService(delay=0.1)
+        executor = BatchingTextToSQLExecutor(service, max_wait_ms=0)
+        
+        future = executor.submit("question")
+        executor.shutdown()
+        
+        self.assertEqual(future.result(timeout=0)['question'], "question")
+        self.assertEqual(service.closed_after, 1)
+        self.assertTrue(executor._loop.is_closed())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+from services.query_validator import QueryValidator
+from tests.support import SampleDatabaseTestCase
+
+# 100 rows from a recursive CTE, so no LIMIT is pushed into the query
+COUNTER_QUERY = (
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100) "
+    "SELECT i FROM n"
+)
+
+class ExecuteSafeQueryTest(SampleDatabaseTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.validator = QueryValidator(self.db_manager)
+    
+    def test_row_layout_is_the_default_even_for_large_limits(self):
+        success, result = self.validator.execute_safe_query(
+            "SELECT user_id, username FROM users ORDER BY user_id", limit=5000
+        )
+        
+        self.assertTrue(success, result)
+        self.assertNotIn('layout', result)
+        self.assertEqual(result['columns'], ['user_id', 'username'])
+        self.assertEqual(result['data'][0]['user_id'], 1)
+        self.assertEqual(result['row_count'], len(result['data']))
+    
+    def test_columnar_layout_on_request(self):
+        success, rows = self.validator.execute_safe_query(
+            "SELECT user_id, username FROM users ORDER BY user_id"
+        )
+        success, result = self.validator.execute_safe_query(
+            "SELECT user_id, username FROM users ORDER BY user_id", columnar=True
+        )
+        
+        self.assertTrue(success, result)
+        self.assertEqual(result['layout'], 'columnar')
+        self.assertEqual(result['columns'], ['user_id', 'username'])
+        self.assertEqual(result['data'], [
+            [row['user_id'] for row in rows['data']],
+            [row['username'] for row in rows['data']]
+        ])
+        self.assertEqual(result['row_count'], rows['row_count'])
+    
+    def test_columnar_layout_keeps_duplicate_column_names(self):
+        success, result = self.validator.execute_safe_query(
+            "SELECT o.user_id, u.user_id FROM orders o JOIN users u ON u.user_id = o.user_id",
+            columnar=True
+        )
+        
+        self.assertTrue(success, result)
+        self.assertEqual(result['columns'], ['user_id', 'user_id'])
+        self.assertEqual(len(result['data']), 2)
+        self.assertEqual(result['data'][0], result['data'][1])
+    
+    def test_limit_caps_queries_without_a_pushed_limit_in_both_layouts(self):
+        success, rows = self.validator.execute_safe_query(COUNTER_QUERY, limit=10)
+        self.assertTrue(success, rows)
+        self.assertEqual(rows['row_count'], 10)
+        
+        success, columns = self.validator.execute_safe_query(COUNTER_QUERY, limit=10, columnar=True)
+        self.assertTrue(success, columns)
+        self.assertEqual(columns['row_count'], 10)
+        self.assertEqual(columns['data'], [list(range(1, 11))])
+    
+    def test_limit_in_subquery_or_literal_does_not_lift_the_cap(self):
+        for query in (
+            f"SELECT i FROM ({COUNTER_QUERY}) WHERE i IN (SELECT i FROM ({COUNTER_QUERY}) LIMIT 50)",
+            f"SELECT i FROM ({COUNTER_QUERY}) WHERE 'no limit' LIKE '%limit%'",
+        ):
+            success, result = self.validator.execute_safe_query(query, limit=10)
+            self.assertTrue(success, result)
+            self.assertEqual(result['row_count'], 10, query)
+    
+    def test_unsafe_queries_are_rejected_in_both_layouts(self):
+        for columnar in (False, True):
+            success, error = self.validator.execute_safe_query("DELETE FROM users", columnar=columnar)
+            self.assertFalse(success)
+            self.assertEqual(error, "Query contains unsafe operations")
+
+if __name__ == '__main__':
+    unittest.main()
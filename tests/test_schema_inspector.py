@@ -0,0 +1,54 @@
+import contextlib
+import sqlite3
+import unittest
+
+from models.schema_inspector import SchemaInspector
+from models.secure_schema_inspector import SecureSchemaInspector
+from services.secure_text_to_sql_service import SecureTextToSQLService
+from tests.support import SampleDatabaseTestCase
+
+class SchemaVersionCachingTest(SampleDatabaseTestCase):
+    
+    def run_ddl(self, script):
+        # Another connection, as a migration run alongside the app would
+        with contextlib.closing(sqlite3.connect(self.db_path)) as conn:
+            conn.executescript(script)
+    
+    def test_context_is_reused_until_the_schema_changes(self):
+        for inspector_class in (SchemaInspector, SecureSchemaInspector):
+            inspector = inspector_class(self.db_manager)
+            table = f"audit_{inspector_class.__name__.lower()}"
+            
+            context = inspector.get_database_context()
+            self.assertIs(inspector.get_database_context(), context)
+            
+            self.run_ddl(f"CREATE TABLE {table} (audit_id INTEGER PRIMARY KEY);")
+            reloaded = inspector.get_database_context()
+            
+            self.assertIsNot(reloaded, context)
+            self.assertIn(table, reloaded['tables'])
+            self.assertNotIn(table, context['tables'])
+    
+    def test_invalidate_reloads_data_only_changes(self):
+        inspector = SchemaInspector(self.db_manager)
+        context = inspector.get_database_context()
+        
+        inspector.invalidate()
+        
+        self.assertIsNot(inspector.get_database_context(), context)
+    
+    def test_secure_service_prompt_follows_schema_changes(self):
+        service = SecureTextToSQLService(self.db_manager)
+        prompt = service.create_secure_prompt('how many users are there')
+        self.assertIs(service.prompt_generator, service.prompt_generator)
+        
+        self.run_ddl("""
+            CREATE TABLE shipments (shipment_id INTEGER PRIMARY KEY, carrier TEXT);
+            CREATE TABLE shipments_sample (shipment_id INTEGER PRIMARY KEY, carrier TEXT);
+        """)
+        
+        self.assertNotIn('shipments', prompt)
+        self.assertIn('shipments', service.create_secure_prompt('how many users are there'))
+
+if __name__ == '__main__':
+    unittest.main()
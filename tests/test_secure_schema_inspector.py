@@ -0,0 +1,68 @@
+import contextlib
+import sqlite3
+import time
+import unittest
+
+from models.database import TableSchema
+from models.secure_schema_inspector import SecureSchemaInspector
+from tests.support import SampleDatabaseTestCase
+
+class MockColumnProjectionTest(SampleDatabaseTestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A mock table that lacks one of the real table's columns
+        with contextlib.closing(sqlite3.connect(cls.db_path)) as conn:
+            conn.executescript("""
+                CREATE TABLE widgets (widget_id INTEGER PRIMARY KEY, name TEXT, secret TEXT);
+                CREATE TABLE widgets_sample (widget_id INTEGER PRIMARY KEY, name TEXT);
+                INSERT INTO widgets_sample VALUES (1, 'demo widget'), (2, 'test widget');
+            """)
+    
+    def setUp(self):
+        super().setUp()
+        self.inspector = SecureSchemaInspector(self.db_manager)
+    
+    def test_single_table_samples_only_select_columns_the_mock_table_has(self):
+        schema = self.inspector.get_table_schema('widgets')
+        
+        self.assertEqual([column['name'] for column in schema.columns], ['widget_id', 'name', 'secret'])
+        self.assertEqual(schema.sample_columns, ['widget_id', 'name'])
+        self.assertEqual(schema.sample_rows, [(1, 'demo widget'), (2, 'test widget')])
+    
+    def test_single_table_and_bulk_paths_agree(self):
+        context = self.inspector.get_database_context()
+        
+        for table in ('widgets', 'users', 'orders'):
+            single = self.inspector.get_table_schema(table)
+            bulk = context['schemas'][table]
+            self.assertEqual(single.columns, bulk.columns, table)
+            self.assertEqual(single.sample_columns, bulk.sample_columns, table)
+            self.assertEqual(single.sample_rows, bulk.sample_rows, table)
+
+class PrefetchSamplesTest(SampleDatabaseTestCase):
+    
+    def test_sample_loads_overlap(self):
+        inspector = SecureSchemaInspector(self.db_manager)
+        workers = inspector.SAMPLE_PREFETCH_WORKERS
+        
+        def slow_loader():
+            time.sleep(0.2)
+            return ['id'], [(1,)]
+        
+        schemas = [
+            TableSchema(name=f"t{i}", columns=[], sample_loader=slow_loader)
+            for i in range(workers)
+        ]
+        
+        started = time.monotonic()
+        inspector._prefetch_samples(schemas)
+        elapsed = time.monotonic() - started
+        
+        self.assertTrue(all(schema.sample_rows == [(1,)] for schema in schemas))
+        # One after another would take workers * 0.2s
+        self.assertLess(elapsed, 0.2 * workers / 2)
+
+if __name__ == '__main__':
+    unittest.main()
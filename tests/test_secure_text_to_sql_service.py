@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import unittest
+
+from services.secure_text_to_sql_service import SecureTextToSQLService
+from tests.support import SampleDatabaseTestCase
+
+class FakeOpenAIService:
+    """Answers prompts from a question -> SQL map and counts the calls"""
+    
+    def __init__(self, queries):
+        self.queries = queries
+        self.calls = []
+    
+    def _answer(self, prompt):
+        # The question is the last thing in the prompt that names one
+        matches = [question for question in self.queries if question in prompt]
+        return self.queries[max(matches, key=prompt.rindex)]
+    
+    def test_connection(self):
+        return True
+    
+    def generate_sql(self, prompt):
+        self.calls.append('generate_sql')
+        return self._answer(prompt)
+    
+    async def agenerate_sql(self, prompt):
+        self.calls.append('agenerate_sql')
+        return self._answer(prompt)
+    
+    def _answer_batch(self, prompt):
+        # One query per question, in the order the prompt lists them
+        questions = sorted((question for question in self.queries if question in prompt), key=prompt.rindex)
+        return [self.queries[question] for question in questions]
+    
+    def generate_sql_batch(self, prompt, expected_count):
+        self.calls.append('generate_sql_batch')
+        return self._answer_batch(prompt)
+    
+    async def agenerate_sql_batch(self, prompt, expected_count):
+        self.calls.append('agenerate_sql_batch')
+        return self._answer_batch(prompt)
+
+QUERIES = {
+    'how many users are there': 'SELECT COUNT(*) AS user_count FROM users;',
+    'list the product names': '```sql\nSELECT product_name FROM products_sample ORDER BY product_id;\n```',
+}
+
+class SecureServiceTestCase(SampleDatabaseTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.service = SecureTextToSQLService(self.db_manager)
+        self.openai = FakeOpenAIService(QUERIES)
+        # Replaces the lazily created OpenAI client
+        self.service.openai_service = self.openai
+
+class AsyncProcessingTest(SecureServiceTestCase):
+    
+    def test_aprocess_question_generates_and_executes_sql(self):
+        result = asyncio.run(self.service.aprocess_question('how many users are there'))
+        
+        self.assertTrue(result['success'], result)
+        self.assertEqual(result['query'], 'SELECT COUNT(*) AS user_count FROM users;')
+        self.assertGreater(result['result']['data'][0]['user_count'], 0)
+        self.assertEqual(self.openai.calls, ['agenerate_sql'])
+    
+    def test_aprocess_question_builds_the_prompt_off_the_event_loop(self):
+        prompt_threads = []
+        create_secure_prompt = self.service.create_secure_prompt
+        
+        def recording_create_secure_prompt(question):
+            prompt_threads.append(threading.current_thread())
+            return create_secure_prompt(question)
+        
+        self.service.create_secure_prompt = recording_create_secure_prompt
+        
+        async def run():
+            return threading.current_thread(), await self.service.aprocess_question('how many users are there')
+        
+        loop_thread, result = asyncio.run(run())
+        
+        self.assertTrue(result['success'], result)
+        self.assertEqual(len(prompt_threads), 1)
+        self.assertIsNot(prompt_threads[0], loop_thread)
+    
+    def test_aprocess_questions_uses_one_batch_call_and_keeps_order(self):
+        questions = ['list the product names', 'how many users are there']
+        
+        results = asyncio.run(self.service.aprocess_questions(questions, execute=False))
+        
+        self.assertEqual(self.openai.calls, ['agenerate_sql_batch'])
+        self.assertEqual([result['question'] for result in results], questions)
+        # _sample references are rewritten to the real tables
+        self.assertEqual(results[0]['query'], 'SELECT product_name FROM products ORDER BY product_id;')
+        self.assertNotIn('result', results[0])
+    
+    def test_aprocess_questions_builds_the_batch_prompt_off_the_event_loop(self):
+        prompt_threads = []
+        create_secure_batch_prompt = self.service.create_secure_batch_prompt
+        
+        def recording_create_secure_batch_prompt(questions):
+            prompt_threads.append(threading.current_thread())
+            return create_secure_batch_prompt(questions)
+        
+        self.service.create_secure_batch_prompt = recording_create_secure_batch_prompt
+        
+        async def run():
+            return threading.current_thread(), await self.service.aprocess_questions(list(QUERIES))
+        
+        loop_thread, results = asyncio.run(run())
+        
+        self.assertTrue(all(result['success'] for result in results), results)
+        self.assertEqual(len(prompt_threads), 1)
+        self.assertIsNot(prompt_threads[0], loop_thread)
+    
+    def test_short_questions_are_rejected_without_calling_openai(self):
+        results = asyncio.run(self.service.aprocess_questions(['', 'ab']))
+        
+        self.assertEqual([result['error'] for result in results],
+                         ['Empty question provided', 'Question is too short'])
+        self.assertEqual(self.openai.calls, [])
+
+class ACloseTest(SampleDatabaseTestCase):
+    
+    def test_aclose_does_not_create_an_unused_openai_client(self):
+        service = SecureTextToSQLService(self.db_manager)
+        
+        asyncio.run(service.aclose())
+        
+        self.assertNotIn('openai_service', service.__dict__)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from setup_database import create_sample_database
+
+class CreateSampleDatabaseTest(unittest.TestCase):
+    
+    def test_rebuild_removes_stale_wal_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, 'test.db')
+            with contextlib.redirect_stdout(io.StringIO()):
+                create_sample_database(db_path)
+            
+            # Leave WAL and shared-memory files behind, as a crashed app
+            # connection would
+            conn = sqlite3.connect(db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA wal_autocheckpoint=0")
+            conn.execute("DELETE FROM users")
+            conn.commit()
+            for suffix in ("-wal", "-shm"):
+                shutil.copy(db_path + suffix, db_path + suffix + ".stale")
+            conn.close()
+            for suffix in ("-wal", "-shm"):
+                os.replace(db_path + suffix + ".stale", db_path + suffix)
+            
+            with contextlib.redirect_stdout(io.StringIO()):
+                create_sample_database(db_path)
+            
+            self.assertFalse(os.path.exists(db_path + "-wal"))
+            self.assertFalse(os.path.exists(db_path + "-shm"))
+            with contextlib.closing(sqlite3.connect(db_path)) as fresh:
+                self.assertGreater(fresh.execute("SELECT COUNT(*) FROM users").fetchone()[0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from services.sql_cache import SQLCache
+from tests.test_secure_text_to_sql_service import SecureServiceTestCase
+
+class SQLCacheTest(unittest.TestCase):
+    
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = SQLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+    
+    def test_entries_expire_after_ttl(self):
+        cache = SQLCache(maxsize=10, ttl=30)
+        with mock.patch('services.sql_cache.time.monotonic', return_value=100.0):
+            cache.set('a', 1)
+        with mock.patch('services.sql_cache.time.monotonic', return_value=129.0):
+            self.assertEqual(cache.get('a'), 1)
+        with mock.patch('services.sql_cache.time.monotonic', return_value=130.0):
+            self.assertIsNone(cache.get('a'))
+        
+        self.assertEqual(cache.stats()['size'], 0)
+    
+    def test_stats_count_hits_and_misses(self):
+        cache = SQLCache(maxsize=10, ttl=60)
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('missing')
+        
+        self.assertEqual(cache.stats(), {'size': 1, 'max_size': 10, 'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+class GeneratedSQLCacheTest(SecureServiceTestCase):
+    
+    def test_repeat_question_reuses_generated_sql(self):
+        first = self.service.process_question('how many users are there')
+        second = self.service.process_question('  how many   USERS are there ')
+        
+        self.assertTrue(first['success'], first)
+        self.assertEqual(second['query'], first['query'])
+        self.assertEqual(self.openai.calls, ['generate_sql'])
+    
+    def test_async_batches_skip_cached_questions(self):
+        self.service.process_question('how many users are there')
+        
+        results = asyncio.run(self.service.aprocess_questions(
+            ['how many users are there', 'list the product names']
+        ))
+        
+        self.assertTrue(all(result['success'] for result in results), results)
+        # Only the uncached question reached OpenAI, as a single call
+        self.assertEqual(self.openai.calls, ['generate_sql', 'agenerate_sql'])
+    
+    def test_validated_sql_is_cached_when_execution_is_left_to_the_caller(self):
+        first = self.service.process_question('how many users are there', execute=False)
+        second = self.service.process_question('how many users are there', execute=False)
+        
+        self.assertNotIn('result', first)
+        self.assertEqual(second['query'], first['query'])
+        self.assertEqual(self.openai.calls, ['generate_sql'])
+    
+    def test_failed_sql_is_not_cached(self):
+        self.openai.queries = {'how many users are there': 'SELECT COUNT(*) FROM no_such_users;'}
+        
+        self.service.process_question('how many users are there')
+        self.service.process_question('how many users are there')
+        
+        self.assertEqual(self.openai.calls, ['generate_sql', 'generate_sql'])
+
+if __name__ == '__main__':
+    unittest.main()
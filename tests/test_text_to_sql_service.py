@@ -0,0 +1,121 @@
+import contextlib
+import sqlite3
+import unittest
+from unittest import mock
+
+from config import Config
+from services.text_to_sql_service import TextToSQLService
+from tests.support import SampleDatabaseTestCase
+
+class FixedSQLOpenAIService:
+    """Returns the same generated SQL for every prompt"""
+    
+    def __init__(self, sql):
+        self.sql = sql
+    
+    def generate_sql(self, prompt):
+        return self.sql
+    
+    def test_connection(self):
+        return True
+
+class TextToSQLServiceTestCase(SampleDatabaseTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        with mock.patch.object(Config, 'OPENAI_API_KEY', 'test-key'):
+            self.service = TextToSQLService(self.db_manager)
+
+class CleanGeneratedSQLTest(TextToSQLServiceTestCase):
+    
+    def test_semicolon_inside_string_literal_is_kept(self):
+        self.assertEqual(
+            self.service.clean_generated_sql("SELECT * FROM users WHERE name = 'a;b';"),
+            "SELECT * FROM users WHERE name = 'a;b';"
+        )
+    
+    def test_semicolon_inside_like_pattern_is_kept(self):
+        self.assertEqual(
+            self.service.clean_generated_sql("```sql\nSELECT * FROM products WHERE description LIKE '%;%' LIMIT 5;\n```"),
+            "SELECT * FROM products WHERE description LIKE '%;%' LIMIT 5;"
+        )
+    
+    def test_statement_ends_at_the_line_ending_semicolon(self):
+        self.assertEqual(
+            self.service.clean_generated_sql("Here is the query:\nSELECT name\nFROM users\nWHERE note = 'x; y';  \nThis lists users."),
+            "SELECT name FROM users WHERE note = 'x; y';"
+        )
+
+class ProcessQuestionTest(TextToSQLServiceTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        validator = self.service.validator
+        self.validate_syntax = mock.patch.object(validator, 'validate_syntax', wraps=validator.validate_syntax).start()
+        self.execute_safe_query = mock.patch.object(validator, 'execute_safe_query', wraps=validator.execute_safe_query).start()
+        self.addCleanup(mock.patch.stopall)
+    
+    def ask(self, generated_sql):
+        self.service.openai_service = FixedSQLOpenAIService(generated_sql)
+        return self.service.process_question('how many users are there')
+    
+    def test_valid_query_is_executed_once_without_validation(self):
+        result = self.ask('SELECT COUNT(*) AS n FROM users;')
+        
+        self.assertTrue(result['success'], result)
+        self.assertGreater(result['result']['data'][0]['n'], 0)
+        self.validate_syntax.assert_not_called()
+        self.assertEqual(self.execute_safe_query.call_count, 1)
+    
+    def test_runtime_error_is_returned_without_validating_or_rerunning(self):
+        result = self.ask('SELECT abs(-9223372036854775807 - 1) AS n FROM users;')
+        
+        self.assertFalse(result['success'])
+        self.assertIn('integer overflow', result['error'])
+        self.validate_syntax.assert_not_called()
+        self.assertEqual(self.execute_safe_query.call_count, 1)
+    
+    def test_prepare_error_falls_back_to_validation(self):
+        result = self.ask('SELECT COUNT(*) FROM no_such_users;')
+        
+        self.assertFalse(result['success'])
+        self.assertIn('Invalid SQL generated', result['error'])
+        self.assertIn('no such table', result['error'])
+        self.assertGreaterEqual(self.validate_syntax.call_count, 1)
+        self.assertEqual(self.execute_safe_query.call_count, 1)
+    
+    def test_short_question_is_rejected_before_generation(self):
+        self.service.openai_service = mock.Mock()
+        
+        result = self.service.process_question('ab')
+        
+        self.assertEqual(result['error'], 'Question is too short')
+        self.service.openai_service.generate_sql.assert_not_called()
+
+class ValidationCacheTest(TextToSQLServiceTestCase):
+    
+    def test_schema_change_drops_cached_validation_outcomes(self):
+        query = "SELECT COUNT(*) FROM coupons;"
+        self.assertFalse(self.service.validator.validate_syntax(query)[0])
+        
+        with contextlib.closing(sqlite3.connect(self.db_path)) as conn:
+            conn.execute("CREATE TABLE coupons (coupon_id INTEGER PRIMARY KEY)")
+        self.service.openai_service = FixedSQLOpenAIService(query)
+        result = self.service.process_question('how many coupons are there')
+        
+        self.assertTrue(result['success'], result)
+        self.assertEqual(self.service.validator.validate_syntax(query), (True, None))
+
+class DatabaseInfoTest(TextToSQLServiceTestCase):
+    
+    def test_building_the_context_does_not_load_samples(self):
+        schemas = self.service.db_context['schemas']
+        
+        self.assertFalse(any(schema.samples_loaded for schema in schemas.values()))
+        self.assertTrue(all(
+            info['sample_rows'] is None
+            for info in self.service._debug_info_static['schemas'].values()
+        ))
+
+if __name__ == '__main__':
+    unittest.main()